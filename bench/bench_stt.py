@@ -0,0 +1,74 @@
+import time
+import wave
+
+import numpy as np
+
+from common import percentiles
+
+
+def _read_wav(path, samplerate):
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        if wf.getframerate() != samplerate:
+            raise ValueError(f"{path}: expected {samplerate} Hz, got {wf.getframerate()} Hz")
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if wf.getnchannels() > 1:
+            pcm = pcm.reshape(-1, wf.getnchannels())[:, 0].copy()
+    # tambah 1 detik sunyi di akhir supaya endpoint / VAD sempat menutup utterance
+    return np.concatenate([pcm, np.zeros(samplerate, dtype=np.int16)])
+
+
+def run(wav_paths, model_path, samplerate=16000):
+    """
+    Masukkan file WAV lewat VoskSTT (VAD + recognizer, tanpa mikrofon).
+    - mode cepat: real-time factor (waktu decode / durasi audio)
+    - mode realtime: time-to-final dari akhir ucapan (VAD) sampai utterance final
+    """
+    from audio.stt_vosk import VoskSTT
+
+    stt = VoskSTT(model_path=model_path, samplerate=samplerate)
+    stt.start(open_stream=False)
+    block = stt.blocksize
+    rtf, ttf = [], []
+    transcripts = []
+
+    for path in wav_paths:
+        pcm = _read_wav(path, samplerate)
+        duration = len(pcm) / samplerate
+        blocks = [pcm[i:i + block].tobytes() for i in range(0, len(pcm), block)]
+
+        # 1) secepat mungkin
+        t0 = time.monotonic()
+        for b in blocks:
+            stt.feed_audio(b)
+        while stt.pending():
+            time.sleep(0.005)
+        rtf.append((time.monotonic() - t0) / duration)
+        while stt.next_utterance(timeout=0.5) is not None:
+            pass
+
+        # 2) realtime, seperti mikrofon
+        next_t = time.monotonic()
+        for b in blocks:
+            next_t += block / samplerate
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            stt.feed_audio(b)
+        while True:
+            utt = stt.next_utterance(timeout=2.0)
+            if utt is None:
+                break
+            transcripts.append(utt.text)
+            if utt.speech_end:
+                ttf.append(utt.end - utt.speech_end)
+
+    stt.stop()
+    metrics = {"stt.files": len(wav_paths), "stt.utterances": len(transcripts)}
+    metrics.update(percentiles(rtf, "stt.rtf", unit_scale=1.0, suffix=""))
+    metrics.update(percentiles(ttf, "stt.time_to_final"))
+    vad = stt.vad_stats()
+    if "gated_ratio" in vad:
+        metrics["stt.vad_ratio_gated"] = vad["gated_ratio"]
+    return metrics, transcripts
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from common import percentiles
+from stub_llm import StubLLMServer
+
+DEFAULT_TURNS = [
+    "maju",
+    "turn left",
+    "what do you see",
+    "tell me a joke",
+    "how are you today",
+    "berhenti",
+    "tell me a joke",
+]
+
+
+class BenchEngine:
+    """Engine TTS deterministik: nada sinus, durasi sebanding panjang teks, biaya sintesis tetap."""
+
+    name = "bench"
+
+    def __init__(self, voice=None, samplerate=24000, cost_per_char=0.002):
+        self.voice = voice
+        self.samplerate = samplerate
+        self.cost_per_char = cost_per_char
+
+    def synthesize(self, text, lang="id"):
+        from audio.tts import Audio
+
+        time.sleep(self.cost_per_char * len(text))
+        n = int(self.samplerate * 0.06 * max(1, len(text.split())))
+        t = np.arange(n, dtype=np.float32) / self.samplerate
+        return Audio((np.sin(2 * np.pi * 220.0 * t) * 8000).astype(np.int16), self.samplerate)
+
+
+class NullOutput:
+    def play(self, audio):
+        return True
+
+    def interrupt(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def run(turns=None, first_token_delay=0.25, token_delay=0.02):
+    """
+    Satu turn = teks user -> IntentMatcher -> (fast path | LLMClient.chat_stream ke stub server
+    -> SentenceSegmenter) -> TTS.synthesize. Playback tidak diukur (NullOutput).
+    """
+    turns = turns or DEFAULT_TURNS
+    server = StubLLMServer(first_token_delay=first_token_delay, token_delay=token_delay).start()
+    tmp = tempfile.mkdtemp(prefix="bench-turn-")
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["OPENAI_API_KEY"] = "bench"
+
+    import llm.llm_client
+    from audio.tts import TTS, register_engine
+    from llm.intents import IntentMatcher, describe_objects
+    from llm.segmenter import SentenceSegmenter
+    from vision.state import SceneState
+
+    llm.llm_client.DB_PATH = os.path.join(tmp, "history.db")
+    register_engine("bench", BenchEngine)
+    tts = TTS(engine="bench", fallback="", cache_dir=os.path.join(tmp, "tts"), output=NullOutput())
+    client = llm.llm_client.LLMClient()
+    matcher = IntentMatcher()
+    scene_state = SceneState()
+
+    fast, first_token, first_sentence, first_audio, total = [], [], [], [], []
+    try:
+        for text in turns:
+            t0 = time.monotonic()
+            intent = matcher.match(text)
+            if intent is not None:
+                # balasan lokal: deskripsi scene atau acknowledgement perintah
+                if intent.name.startswith("scene_"):
+                    reply = describe_objects(scene_state.snapshot().objects, intent.lang)
+                else:
+                    reply = intent.name.replace("_", " ")
+                tts.synthesize(reply, intent.lang)
+                fast.append(time.monotonic() - t0)
+                continue
+
+            segmenter = SentenceSegmenter()
+            t_token = t_sentence = t_audio = None
+            for delta in client.chat_stream([{"role": "user", "content": text}]):
+                t_token = t_token or time.monotonic()
+                for sentence in segmenter.feed(delta):
+                    t_sentence = t_sentence or time.monotonic()
+                    tts.synthesize(sentence, "en")
+                    t_audio = t_audio or time.monotonic()
+            for sentence in segmenter.flush():
+                t_sentence = t_sentence or time.monotonic()
+                tts.synthesize(sentence, "en")
+                t_audio = t_audio or time.monotonic()
+            end = time.monotonic()
+            if t_token is None:
+                continue
+            first_token.append(t_token - t0)
+            first_sentence.append((t_sentence or end) - t0)
+            first_audio.append((t_audio or end) - t0)
+            total.append(end - t0)
+    finally:
+        client.close()
+        server.stop()
+
+    metrics = {"turn.count": len(turns), "turn.fast_path": len(fast), "turn.llm_requests": server.requests}
+    metrics.update(percentiles(fast, "turn.fast_path"))
+    metrics.update(percentiles(first_token, "turn.first_token"))
+    metrics.update(percentiles(first_sentence, "turn.first_sentence"))
+    metrics.update(percentiles(first_audio, "turn.first_audio"))
+    metrics.update(percentiles(total, "turn.total"))
+    return metrics
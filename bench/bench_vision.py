@@ -0,0 +1,60 @@
+import time
+
+from common import percentiles
+
+
+def run(video_path, realtime=True, max_frames=None, scheduler=True):
+    """
+    Replay file video lewat Camera (grabber thread) -> Scene (+ InferenceScheduler),
+    persis seperti vision_worker. Mengukur FPS inference, latensi, dan frame yang di-drop.
+    """
+    from vision.camera import Camera
+    from vision.scene import Scene
+    from vision.scheduler import InferenceScheduler
+
+    cam = Camera(device_index=video_path, realtime=realtime)
+    if cam.cap is None:
+        raise RuntimeError(f"Cannot open video {video_path}")
+    scene = Scene()
+    detector = InferenceScheduler(scene) if scheduler else None
+
+    infer, frame_age = [], []
+    frames = dropped = 0
+    cam.start()
+    start = time.monotonic()
+    last_seq = -1
+    buf = None
+    while max_frames is None or frames < max_frames:
+        packet = cam.read_latest(after_seq=last_seq, timeout=2.0, out=buf)
+        if packet is None:
+            break  # video habis
+        last_seq = packet.seq
+        buf = packet.frame
+        frames += 1
+        dropped += packet.dropped
+
+        t0 = time.monotonic()
+        if detector is not None:
+            _, _, _, ran = detector.process(buf, packet.timestamp)
+        else:
+            scene.detect(buf)
+            ran = True
+        t1 = time.monotonic()
+        if ran:
+            infer.append(t1 - t0)
+            frame_age.append(t1 - packet.timestamp)
+    elapsed = time.monotonic() - start
+    cam.release()
+
+    metrics = {
+        "vision.frames": frames,
+        "vision.inferences": len(infer),
+        "vision.dropped_frames": dropped,
+        "vision.inference_fps": round(len(infer) / elapsed, 2) if elapsed else 0.0,
+        "vision.infer_busy_ratio": round(sum(infer) / elapsed, 3) if elapsed else 0.0,
+    }
+    if detector is not None:
+        metrics["vision.scheduler_skip_ratio"] = round(detector.skip_ratio, 3)
+    metrics.update(percentiles(infer, "vision.inference"))
+    metrics.update(percentiles(frame_age, "vision.frame_to_result"))
+    return metrics
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+import time
+
+# semua bench dijalankan dari root repo: python bench/run.py ...
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def percentiles(values, prefix, unit_scale=1000.0, suffix="_ms"):
+    """Return dict {prefix_p50_ms, prefix_p95_ms, prefix_max_ms} dari list detik."""
+    data = sorted(values)
+    if not data:
+        return {}
+
+    def pct(q):
+        return round(data[min(len(data) - 1, int(q * len(data)))] * unit_scale, 3)
+
+    return {
+        f"{prefix}_p50{suffix}": pct(0.50),
+        f"{prefix}_p95{suffix}": pct(0.95),
+        f"{prefix}_max{suffix}": round(data[-1] * unit_scale, 3),
+    }
+
+
+def higher_is_better(name):
+    return name.endswith(("fps", "_ratio_gated", "_skip_ratio"))
+
+
+def compare(current, baseline, threshold):
+    """Bandingkan metrik dengan baseline. Return list regresi (name, baseline, current, change)."""
+    regressions = []
+    for name, value in current.items():
+        base = baseline.get(name)
+        if not isinstance(value, (int, float)) or not isinstance(base, (int, float)) or base == 0:
+            continue
+        change = (value - base) / abs(base)
+        worse = -change if higher_is_better(name) else change
+        if worse > threshold:
+            regressions.append((name, base, value, round(change * 100, 1)))
+    return regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f).get("metrics", {})
+
+
+def save_results(path, metrics, meta):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"time": time.time(), "meta": meta, "metrics": metrics}, f, indent=1, sort_keys=True)
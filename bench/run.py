@@ -0,0 +1,68 @@
+"""
+Benchmark headless: replay video, WAV, dan turn percakapan (stub LLM) tanpa kamera/mic/speaker.
+
+    python bench/run.py --video data/walk.mp4 --wav data/hello.wav --out logs/bench.json
+    python bench/run.py --video data/walk.mp4 --baseline logs/bench_baseline.json
+"""
+import argparse
+import platform
+import sys
+
+from common import compare, load_results, save_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible latency benchmark")
+    parser.add_argument("--video", help="file video untuk replay vision")
+    parser.add_argument("--no-realtime", action="store_true", help="putar video secepat mungkin")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--wav", action="append", default=[], help="file WAV 16 kHz mono (boleh berulang)")
+    parser.add_argument("--vosk-model", default="models/vosk-model-small-en-us-0.15")
+    parser.add_argument("--turns", action="store_true", help="jalankan bench turn percakapan dengan stub LLM")
+    parser.add_argument("--first-token-delay", type=float, default=0.25)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--out", default="logs/bench.json")
+    parser.add_argument("--baseline", help="hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regresi relatif yang ditoleransi")
+    args = parser.parse_args(argv)
+
+    if not (args.video or args.wav or args.turns):
+        parser.error("pilih minimal satu: --video, --wav, atau --turns")
+
+    metrics, meta = {}, {"python": platform.python_version(), "machine": platform.machine()}
+    if args.video:
+        import bench_vision
+
+        metrics.update(bench_vision.run(args.video, realtime=not args.no_realtime, max_frames=args.max_frames))
+        meta["video"] = args.video
+    if args.wav:
+        import bench_stt
+
+        stt_metrics, transcripts = bench_stt.run(args.wav, args.vosk_model)
+        metrics.update(stt_metrics)
+        meta["wav"] = args.wav
+        meta["transcripts"] = transcripts
+    if args.turns:
+        import bench_turn
+
+        metrics.update(bench_turn.run(first_token_delay=args.first_token_delay, token_delay=args.token_delay))
+        meta["first_token_delay"] = args.first_token_delay
+        meta["token_delay"] = args.token_delay
+
+    for name, value in sorted(metrics.items()):
+        print(f"{name:40s} {value}")
+    save_results(args.out, metrics, meta)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        regressions = compare(metrics, load_results(args.baseline), args.threshold)
+        for name, base, value, change in regressions:
+            print(f"[REGRESSION] {name}: {base} -> {value} ({change:+.1f}%)")
+        if regressions:
+            return 1
+        print("No regressions above threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Hello there! I am Karen, your friendly robot. "
+    "I can see a few things around me, and I am happy to help. "
+    "Do you want to hear a joke about robots?"
+)
+
+
+class StubLLMServer:
+    """
+    Server lokal yang meniru endpoint OpenAI /v1/responses (stream SSE dan non-stream)
+    dengan delay yang bisa diatur, supaya latensi turn bisa diukur tanpa jaringan.
+    """
+
+    def __init__(self, reply=DEFAULT_REPLY, first_token_delay=0.25, token_delay=0.02, port=0):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests += 1
+                if not self.path.rstrip("/").endswith("/responses"):
+                    self.send_error(404)
+                    return
+                if body.get("stream"):
+                    self._stream(body)
+                else:
+                    self._complete(body)
+
+            def _response(self, body, text, status="completed"):
+                return {
+                    "id": f"resp_bench_{server.requests}",
+                    "object": "response",
+                    "created_at": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "status": status,
+                    "output": [{
+                        "id": "msg_bench",
+                        "type": "message",
+                        "role": "assistant",
+                        "status": status,
+                        "content": [{"type": "output_text", "text": text, "annotations": []}],
+                    }],
+                }
+
+            def _complete(self, body):
+                time.sleep(server.first_token_delay + server.token_delay * len(server.reply.split()))
+                data = json.dumps(self._response(body, server.reply)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _event(self, seq, payload):
+                payload["sequence_number"] = seq
+                chunk = f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n".encode()
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                seq = 0
+                self._event(seq, {"type": "response.created", "response": self._response(body, "", "in_progress")})
+                time.sleep(server.first_token_delay)
+                words = server.reply.split(" ")
+                for i, word in enumerate(words):
+                    seq += 1
+                    delta = word if i == 0 else " " + word
+                    self._event(seq, {"type": "response.output_text.delta", "item_id": "msg_bench",
+                                      "output_index": 0, "content_index": 0, "delta": delta})
+                    time.sleep(server.token_delay)
+                seq += 1
+                self._event(seq, {"type": "response.completed", "response": self._response(body, server.reply)})
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.port = self.httpd.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-llm", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stub server OpenAI Responses API untuk benchmark")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--first-token-delay", type=float, default=0.25)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    srv = StubLLMServer(first_token_delay=args.first_token_delay, token_delay=args.token_delay, port=args.port)
+    print(f"Stub LLM listening on {srv.base_url}")
+    srv.httpd.serve_forever()
@@ -9,7 +9,7 @@ sudo apt update && sudo apt upgrade -y
 echo "Installing system packages..."
 sudo apt install -y python3-venv python3-pip build-essential \
     libatlas-base-dev libblas-dev liblapack-dev \
-    libjpeg-dev portaudio19-dev libasound2-dev \
+    libjpeg-dev portaudio19-dev libasound2-dev espeak-ng \
     git curl
 
 echo "Setting up virtual environment..."
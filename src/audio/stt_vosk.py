@@ -1,57 +1,273 @@
+import logging
+import os
 import queue
-import sounddevice as sd
+import threading
+import time
+from typing import Iterator, NamedTuple, Optional
+
 import json
-from vosk import Model, KaldiRecognizer
+
+from audio.vad import EnergyVAD
+
+logger = logging.getLogger(__name__)
+
+
+class Utterance(NamedTuple):
+    text: str
+    lang: str
+    start: float  # time.monotonic() saat partial pertama muncul
+    end: float  # time.monotonic() saat hasil final keluar
+    partials: int  # berapa kali partial berubah selama utterance
+    kind: str = "dictation"  # "command" kalau dari recognizer grammar
+    speech_end: float = 0.0  # time.monotonic() blok suara terakhir menurut VAD (0 = tidak diketahui)
+
 
 class VoskSTT:
-    def __init__(self, model_path: str, samplerate: int = 16000, device=None):
+    def __init__(self, model_path: str, samplerate: int = 16000, device=None, blocksize: int = None,
+                 lang: str = "en", vad: Optional[bool] = None, command_grammar=None,
+                 urgent_commands=("stop", "halt", "berhenti")):
         self.q = queue.Queue()
         self.samplerate = samplerate
         self.device = device
+        # 2000 sample = 125 ms per blok (dulu 8000 = 0.5 s)
+        self.blocksize = blocksize or int(os.getenv("STT_BLOCKSIZE", "2000"))
+        self.lang = lang
+        from vosk import Model  # import berat ditunda sampai model benar-benar di-load
+
         self.model = Model(model_path)
         self.stream = None
 
+        # gate VAD di depan Kaldi: blok sunyi tidak pernah di-decode
+        if vad is None:
+            vad = os.getenv("STT_VAD", "1") == "1"
+        self.vad = EnergyVAD(threshold=float(os.getenv("STT_VAD_THRESHOLD", "300"))) if vad else None
+
+        # recognizer kedua dengan daftar frasa perintah: decode jauh lebih cepat & akurat
+        if os.getenv("STT_COMMAND_GRAMMAR", "1") != "1":
+            command_grammar = None
+        self.command_grammar = list(command_grammar) if command_grammar else None
+        self.urgent_commands = set(urgent_commands)
+        self._cmd_rec = None
+        self._cmd_emitted = set()
+        # nomor segmen suara (VAD; tanpa VAD tiap final dictation menutup segmen). Kalau segmen
+        # sudah menghasilkan command, final dictation segmen itu dibuang supaya tidak dobel.
+        self._segment = 0
+        self._cmd_segment = -1
+
+        self.utterances_q = queue.Queue()
+        self.partial = ""
+        self.on_partial = None  # callback(text) opsional
+        self.on_audio = None  # callback(pcm_bytes) opsional, tiap blok mentah sebelum VAD (flight recorder)
+        self._rec = None
+        self._started = None
+        self._partials = 0
+        self._thread = None
+        self._running = threading.Event()
+        self._wants_stream = False  # start() dengan mikrofon (bukan feed_audio)
+
     def _callback(self, indata, frames, time, status):
         if status:
-            print(f"[Audio Warning] {status}")  # hindari crash
+            logger.warning("Audio status: %s", status)  # dipanggil dari callback audio: hanya enqueue
         self.q.put(bytes(indata))
 
-    def listen_once(self, timeout=10):
-        rec = KaldiRecognizer(self.model, self.samplerate)
-        text = ""
+    # =====================
+    # Streaming session
+    # =====================
+    def start(self, open_stream: bool = True):
+        """
+        Buka audio stream + recognizer sekali untuk seluruh umur proses.
+        open_stream=False: tanpa mikrofon, audio dimasukkan manual lewat feed_audio() (benchmark).
+        Kalau mikrofon gagal dibuka, exception diteruskan dan start() berikutnya mencoba lagi.
+        """
+        if self._running.is_set():
+            if self._wants_stream and self.stream is None:
+                self._open_stream()  # stream sempat gagal dibuka (mis. saat set_blocksize)
+                logger.info("🎤 Listening ...")
+            return self
+        from vosk import KaldiRecognizer
+
+        self._rec = KaldiRecognizer(self.model, self.samplerate)
+        if self.command_grammar:
+            # satu Model dipakai bersama; grammar butuh "[unk]" untuk menampung kata lain
+            grammar = json.dumps(self.command_grammar + ["[unk]"])
+            self._cmd_rec = KaldiRecognizer(self.model, self.samplerate, grammar)
+        if open_stream:
+            self._open_stream()  # sebelum decoder jalan: kalau gagal, state tetap "belum start"
+        self._wants_stream = open_stream
+        self._running.set()
+        self._thread = threading.Thread(target=self._decode_loop, name="stt-decoder", daemon=True)
+        self._thread.start()
+        if open_stream:
+            logger.info("🎤 Listening ...")
+        return self
+
+    def _open_stream(self):
+        import sounddevice as sd
 
+        stream = sd.RawInputStream(
+            samplerate=self.samplerate,
+            blocksize=self.blocksize,
+            dtype="int16",
+            channels=1,
+            device=self.device,
+            callback=self._callback,
+        )
         try:
-            with sd.RawInputStream(
-                samplerate=self.samplerate,
-                blocksize=8000,
-                dtype="int16",
-                channels=1,
-                device=self.device,
-                callback=self._callback,
-            ):
-                print("🎤 Listening ...")
-
-                for _ in range(int(self.samplerate / 8000 * timeout)):
-                    try:
-                        data = self.q.get(timeout=1)  # biar nggak freeze
-                    except queue.Empty:
-                        continue
-
-                    if rec.AcceptWaveform(data):
-                        res = json.loads(rec.Result())
-                        text = res.get("text", "").strip()
-                        if text:  # stop lebih cepat kalau ada hasil
-                            break
-                    else:
-                        # ambil partial result
-                        partial = json.loads(rec.PartialResult())
-                        if partial.get("partial"):
-                            print(f"(partial) {partial['partial']}")
+            stream.start()
+        except Exception:
+            stream.close()
+            raise
+        self.stream = stream
 
+    def _close_stream(self):
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop()
+            self.stream.close()
         except Exception as e:
-            print(f"[Error] STT failed: {e}")
-            return None, None
+            logger.warning("Failed to close audio stream: %s", e)
+        self.stream = None
+
+    def set_blocksize(self, blocksize: int) -> bool:
+        """
+        Ganti ukuran blok mikrofon; stream dibuka ulang (jeda audio sesaat). Kalau gagal, stream
+        dibuka lagi dengan blocksize lama dan return False. Kalau itu pun gagal, exception
+        diteruskan; stream None dan start() berikutnya (next_utterance) mencoba membuka lagi.
+        """
+        if blocksize == self.blocksize:
+            return True
+        old, self.blocksize = self.blocksize, blocksize
+        if self.stream is None:
+            return True
+        self._close_stream()
+        try:
+            self._open_stream()
+            return True
+        except Exception as e:
+            logger.warning("Failed to reopen audio stream with blocksize %d: %s", blocksize, e)
+            self.blocksize = old
+        self._open_stream()
+        return False
 
-        if text:
-            return text, "en"  # sementara pakai bahasa Indonesia
-        return None, None
\ No newline at end of file
+    def feed_audio(self, data: bytes):
+        """Masukkan PCM int16 mono secara manual (dipakai bersama start(open_stream=False))."""
+        self.q.put(data)
+
+    def pending(self) -> int:
+        """Jumlah blok audio yang belum di-decode."""
+        return self.q.qsize()
+
+    def stop(self):
+        self._running.clear()
+        self._close_stream()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _decode_loop(self):
+        self._started = None
+        self._partials = 0
+        while self._running.is_set():
+            try:
+                data = self.q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                if self.on_audio:
+                    self.on_audio(data)
+                blocks, ended = self.vad.process(data) if self.vad else ([data], False)
+                for block in blocks:
+                    if self._cmd_rec is not None:
+                        self._handle_command(*self._feed(block, self._cmd_rec))
+                    self._handle(*self._feed(block))
+                if ended:
+                    # segmen suara selesai tapi Kaldi belum endpoint -> paksa final (sekalian reset)
+                    self._handle(True, json.loads(self._rec.FinalResult()).get("text", "").strip())
+                    self._end_segment()
+            except Exception as e:
+                logger.error("STT failed: %s", e)
+
+    def _handle_command(self, final, text):
+        text = text.replace("[unk]", "").strip()
+        if not text or text not in self.command_grammar or text in self._cmd_emitted:
+            return
+        # perintah darurat (stop) langsung dikirim dari partial, sisanya tunggu final grammar
+        if final or text in self.urgent_commands:
+            now = time.monotonic()
+            self._cmd_emitted.add(text)
+            self._cmd_segment = self._segment
+            self.utterances_q.put(Utterance(text, self.lang, self._started or now, now, self._partials, "command",
+                                            self._speech_end(now)))
+
+    def _handle(self, final, text):
+        if final:
+            if self._cmd_rec is not None:
+                # dua recognizer endpoint sendiri-sendiri: paksa final grammar dulu sebelum memutuskan
+                self._handle_command(True, json.loads(self._cmd_rec.FinalResult()).get("text", "").strip())
+            if text and self._cmd_segment == self._segment:
+                logger.debug("Dictation %r dropped: command already emitted for this segment", text)
+            elif text:
+                now = time.monotonic()
+                self.utterances_q.put(Utterance(text, self.lang, self._started or now, now, self._partials,
+                                                speech_end=self._speech_end(now)))
+            self._started, self._partials = None, 0
+            self.partial = ""
+            if self.vad is None:
+                self._end_segment()
+        elif text and text != self.partial:
+            if self._started is None:
+                self._started = time.monotonic()
+            self._partials += 1
+            self.partial = text
+            logger.debug("(partial) %s", text)
+            if self.on_partial:
+                self.on_partial(text)
+
+    def _end_segment(self):
+        self._segment += 1
+        self._cmd_emitted = set()
+
+    def _speech_end(self, now):
+        if self.vad is not None and self.vad.last_speech:
+            return min(self.vad.last_speech, now)
+        return now
+
+    def _feed(self, data, rec=None):
+        """Masukkan satu blok audio ke recognizer. Return (is_final, text)."""
+        rec = rec or self._rec
+        if rec.AcceptWaveform(data):
+            return True, json.loads(rec.Result()).get("text", "").strip()
+        return False, json.loads(rec.PartialResult()).get("partial", "")
+
+    def vad_stats(self) -> dict:
+        return self.vad.stats(self.samplerate) if self.vad else {}
+
+    def utterances(self, timeout: Optional[float] = None) -> Iterator[Utterance]:
+        """Generator utterance final. Berhenti jika tidak ada utterance dalam `timeout` detik."""
+        self.start()
+        while self._running.is_set():
+            try:
+                yield self.utterances_q.get(timeout=timeout)
+            except queue.Empty:
+                return
+
+    def next_utterance(self, timeout=10) -> Optional[Utterance]:
+        """Utterance final berikutnya (dengan timestamp), atau None jika timeout."""
+        self.start()
+        try:
+            return self.utterances_q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def listen_once(self, timeout=10):
+        try:
+            self.start()
+            utt = self.utterances_q.get(timeout=timeout)
+        except queue.Empty:
+            return None, None
+        except Exception as e:
+            logger.error("STT failed: %s", e)
+            return None, None
+        return utt.text, utt.lang
@@ -1,40 +1,239 @@
 # src/audio/tts.py
-from gtts import gTTS
-import tempfile
+import io
+import logging
 import os
-import subprocess
-import platform
+import tempfile
+import threading
+import wave
+from typing import NamedTuple
 
-class TTS:
-    def say(self, text, lang="id"):
-        mp3_file = None
-        try:
-            # Buat file temp mp3
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
-                mp3_file = fp.name
-
-            # Generate TTS (mp3)
-            tts = gTTS(text=text, lang=lang)
-            tts.save(mp3_file)
-
-            # Mainkan mp3
-            if platform.system() == "Darwin":
-                # MacOS pakai afplay
-                subprocess.run(["afplay", mp3_file])
-            elif platform.system() == "Windows":
-                # Windows pakai start / miniplayer
-                subprocess.run(["powershell", "-c", f"(New-Object Media.SoundPlayer '{mp3_file}').PlaySync();"])
+import numpy as np
+
+from audio.tts_cache import TTSCache
+
+logger = logging.getLogger(__name__)
+
+
+class Audio(NamedTuple):
+    pcm: np.ndarray  # int16 mono
+    samplerate: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / self.samplerate if self.samplerate else 0.0
+
+
+def write_wav(path, audio: Audio):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(audio.samplerate)
+        wf.writeframes(audio.pcm.tobytes())
+
+
+def read_wav(src) -> Audio:
+    with wave.open(src, "rb") as wf:
+        data = wf.readframes(wf.getnframes())
+        pcm = np.frombuffer(data, dtype=np.int16)
+        if wf.getnchannels() > 1:
+            pcm = pcm.reshape(-1, wf.getnchannels()).mean(axis=1).astype(np.int16)
+        return Audio(pcm, wf.getframerate())
+
+
+# =====================
+# Engines
+# =====================
+# Engine cukup punya atribut `name`, `voice` dan method synthesize(text, lang) -> Audio.
+class GTTSEngine:
+    """Google TTS (butuh internet). MP3 di-decode di memori ke PCM (miniaudio), hasilnya di-cache."""
+
+    name = "gtts"
+
+    def __init__(self, voice=None, samplerate=24000):
+        import miniaudio
+        from gtts import gTTS
+
+        self._gtts = gTTS
+        self._miniaudio = miniaudio
+        self.voice = voice
+        self.samplerate = samplerate
+
+    def synthesize(self, text, lang="id") -> Audio:
+        mp3 = io.BytesIO()
+        self._gtts(text=text, lang=lang).write_to_fp(mp3)
+        decoded = self._miniaudio.decode(mp3.getvalue(), output_format=self._miniaudio.SampleFormat.SIGNED16,
+                                         nchannels=1, sample_rate=self.samplerate)
+        return Audio(np.frombuffer(decoded.samples, dtype=np.int16), self.samplerate)
+
+
+class Pyttsx3Engine:
+    """
+    TTS offline lewat pyttsx3 (espeak di Linux). pyttsx3 hanya bisa menulis ke file, jadi satu
+    file wav dipakai ulang di tmpfs (/dev/shm) supaya tidak ada I/O disk per balasan.
+    Kalau `voice` tidak diset, voice dipilih per `lang` dari daftar voice engine.
+    """
+
+    name = "pyttsx3"
+
+    def __init__(self, voice=None, rate=None):
+        import pyttsx3
+
+        self._engine = pyttsx3.init()
+        self._lock = threading.Lock()  # pyttsx3 tidak thread-safe
+        self.voice = voice
+        self._voices = {}  # lang -> voice id
+        self._default = self._current = self._engine.getProperty("voice")
+        if voice:
+            self._engine.setProperty("voice", voice)
+        if rate:
+            self._engine.setProperty("rate", rate)
+        tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        self._tmp = os.path.join(tmp_dir, f"pyttsx3-{os.getpid()}.wav")
+
+    def _voice_for(self, lang):
+        """Voice id pertama yang bahasanya cocok (espeak: languages=[b"\\x05id"]), atau voice default."""
+        if lang not in self._voices:
+            self._voices[lang] = self._default
+            for v in self._engine.getProperty("voices"):
+                langs = [l.decode(errors="ignore") if isinstance(l, bytes) else str(l) for l in v.languages or []]
+                if any(l.lstrip("\x05").lower().startswith(lang) for l in langs):
+                    self._voices[lang] = v.id
+                    break
             else:
-                # Linux pakai mpg123 / mpv (pastikan terinstall)
-                subprocess.run(["mpg123", mp3_file])
+                logger.warning("pyttsx3: tidak ada voice untuk bahasa %r, pakai voice default", lang)
+        return self._voices[lang]
 
-        except Exception as e:
-            print(f"[Error] TTS gagal: {e}")
+    def synthesize(self, text, lang="id") -> Audio:
+        with self._lock:
+            if not self.voice:
+                voice = self._voice_for(lang)
+                if voice != self._current:
+                    self._engine.setProperty("voice", voice)
+                    self._current = voice
+            self._engine.save_to_file(text, self._tmp)
+            self._engine.runAndWait()
+            return read_wav(self._tmp)
 
-        finally:
-            # Bersihkan file temp
-            if mp3_file and os.path.exists(mp3_file):
+
+ENGINES = {
+    "gtts": GTTSEngine,
+    "pyttsx3": Pyttsx3Engine,
+}
+
+
+def register_engine(name, factory):
+    """Daftarkan engine lokal lain yang menghasilkan PCM (factory(voice=...) -> engine)."""
+    ENGINES[name] = factory
+
+
+# =====================
+# Playback
+# =====================
+class AudioOutput:
+    """Satu output stream sounddevice yang tetap terbuka; PCM ditulis langsung dari memori."""
+
+    def __init__(self, samplerate=24000, device=None, chunk_ms=100):
+        import sounddevice as sd
+
+        self.samplerate = samplerate
+        self.chunk = int(samplerate * chunk_ms / 1000)
+        self._interrupt = threading.Event()
+        self.stream = sd.OutputStream(samplerate=samplerate, channels=1, dtype="int16", device=device)
+        self.stream.start()
+
+    def _resample(self, audio: Audio):
+        if audio.samplerate == self.samplerate or len(audio.pcm) == 0:
+            return audio.pcm
+        n = int(round(len(audio.pcm) * self.samplerate / audio.samplerate))
+        x = np.linspace(0, len(audio.pcm) - 1, n)
+        return np.interp(x, np.arange(len(audio.pcm)), audio.pcm).astype(np.int16)
+
+    def play(self, audio: Audio):
+        """Blok sampai audio selesai ditulis ke device, atau sampai interrupt() dipanggil."""
+        self._interrupt.clear()
+        pcm = self._resample(audio).reshape(-1, 1)
+        for i in range(0, len(pcm), self.chunk):
+            if self._interrupt.is_set():
+                return False
+            self.stream.write(pcm[i:i + self.chunk])
+        return True
+
+    def interrupt(self):
+        self._interrupt.set()
+
+    def close(self):
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception:
+            pass
+
+
+class TTS:
+    def __init__(self, engine=None, fallback=None, voice=None, cache_dir=None, cache_max_mb=None,
+                 output=None):
+        engine = engine or os.getenv("TTS_ENGINE", "gtts")
+        fallback = fallback if fallback is not None else os.getenv("TTS_FALLBACK_ENGINE", "pyttsx3")
+        voice = voice or os.getenv("TTS_VOICE") or None
+
+        # engine utama + fallback (mis. saat jaringan mati gTTS gagal, pakai pyttsx3)
+        self.engines = []
+        for name in dict.fromkeys(n for n in (engine, fallback) if n):
+            if name not in ENGINES:
+                logger.warning("TTS engine %r tidak dikenal, pilihan: %s", name, list(ENGINES))
+                continue
+            try:
+                self.engines.append(ENGINES[name](voice=voice))
+            except Exception as e:
+                logger.warning("TTS engine %s tidak bisa dipakai: %s", name, e)
+        if not self.engines:
+            raise RuntimeError("❌ No TTS engine available")
+
+        cache_dir = cache_dir or os.getenv("TTS_CACHE_DIR", "cache/tts")
+        cache_max_mb = float(cache_max_mb or os.getenv("TTS_CACHE_MAX_MB", "50"))
+        self.cache = TTSCache(cache_dir, max_bytes=int(cache_max_mb * 1024 * 1024))
+        self.output = output or AudioOutput(samplerate=int(os.getenv("TTS_SAMPLERATE", "24000")))
+
+    def synthesize(self, text, lang="id") -> Audio:
+        """Return Audio untuk text; dari cache kalau sudah pernah disintesis."""
+        last_error = None
+        for engine in self.engines:
+            key = TTSCache.key(text, lang, engine.name, engine.voice, ext="wav")
+            path = self.cache.get(key)
+            if path:
+                return read_wav(path)
+            try:
+                audio = engine.synthesize(text, lang)
+            except Exception as e:
+                last_error = e
+                logger.warning("TTS engine %s gagal: %s", engine.name, e)
+                continue
+            self.cache.put(key, lambda tmp: write_wav(tmp, audio))
+            return audio
+        raise RuntimeError(f"All TTS engines failed: {last_error}")
+
+    def prewarm(self, phrases, background=True):
+        """Sintesis frasa tetap (mis. acknowledgement perintah) ke cache di awal."""
+        def run():
+            for text, lang in phrases:
                 try:
-                    os.remove(mp3_file)
+                    self.synthesize(text, lang)
                 except Exception as e:
-                    print(f"[WARN] Gagal hapus file {mp3_file}: {e}")
+                    logger.warning("Prewarm TTS gagal untuk %r: %s", text, e)
+
+        if background:
+            threading.Thread(target=run, name="tts-prewarm", daemon=True).start()
+        else:
+            run()
+
+    def play(self, audio: Audio):
+        return self.output.play(audio)
+
+    def interrupt(self):
+        self.output.interrupt()
+
+    def say(self, text, lang="id"):
+        try:
+            self.play(self.synthesize(text, lang))
+        except Exception as e:
+            logger.error("TTS gagal: %s", e)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class TTSCache:
+    """
+    Cache audio hasil TTS di disk, content-addressed dari (text, lang, engine, voice).
+    Urutan LRU disimpan di memori (dibangun ulang dari mtime file saat start) dan file
+    tertua dibuang kalau total ukuran melebihi max_bytes.
+    """
+
+    def __init__(self, cache_dir="cache/tts", max_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # filename -> size, urutan dari paling lama dipakai
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            entries.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total += size
+
+    @staticmethod
+    def key(text, lang, engine, voice=None, ext="mp3"):
+        norm = " ".join(text.split())
+        digest = hashlib.sha1(f"{engine}\0{voice or ''}\0{lang}\0{norm}".encode("utf-8")).hexdigest()
+        return f"{digest}.{ext}"
+
+    def get(self, key):
+        """Return path file jika ada di cache (dan tandai baru dipakai), else None."""
+        path = os.path.join(self.cache_dir, key)
+        with self._lock:
+            if key not in self._index or not os.path.exists(path):
+                self._index.pop(key, None)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path)  # supaya urutan LRU bertahan setelah restart
+        except OSError:
+            pass
+        return path
+
+    def put(self, key, write_fn):
+        """Tulis entry baru lewat write_fn(tmp_path) secara atomik. Return path final."""
+        path = os.path.join(self.cache_dir, key)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        os.close(fd)
+        try:
+            write_fn(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._total -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._total += size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._index) > 1:
+            name, size = self._index.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def stats(self):
+        return {"entries": len(self._index), "bytes": self._total, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,97 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Voice-activity gate berbasis energi (RMS) + zero-crossing rate untuk blok int16 mono.
+    Blok sunyi tidak diteruskan ke recognizer. Saat suara mulai, beberapa blok sebelumnya
+    (pre-roll) ikut dikirim supaya suku kata pertama tidak terpotong; setelah suara berhenti
+    gate tetap terbuka selama `hangover` blok.
+    """
+
+    def __init__(self, threshold: float = 300.0, ratio: float = 3.0, zcr_max: float = 0.35,
+                 preroll: int = 3, hangover: int = 6, noise_alpha: float = 0.05):
+        self.threshold = threshold  # RMS minimum absolut (skala int16)
+        self.ratio = ratio  # RMS harus > ratio * noise floor
+        self.zcr_max = zcr_max  # noise desis punya ZCR tinggi
+        self.hangover = hangover
+        self.noise_alpha = noise_alpha
+
+        self.noise_floor = threshold / ratio
+        self.active = False
+        self.last_speech = 0.0  # time.monotonic() blok suara terakhir
+        self._preroll = deque(maxlen=preroll)
+        self._quiet = 0
+
+        # statistik
+        self.blocks_total = 0
+        self.blocks_gated = 0
+        self.samples_total = 0
+        self.samples_gated = 0
+
+    def is_speech(self, samples) -> bool:
+        if samples.size == 0:
+            return False
+        x = samples.astype(np.float32)
+        rms = float(np.sqrt(np.dot(x, x) / x.size))
+        zcr = float(np.count_nonzero(np.signbit(samples[1:]) != np.signbit(samples[:-1]))) / max(1, samples.size - 1)
+        speech = rms > max(self.threshold, self.noise_floor * self.ratio) and zcr < self.zcr_max
+        if not speech:
+            # adaptasi noise floor hanya dari blok sunyi
+            self.noise_floor += self.noise_alpha * (rms - self.noise_floor)
+        return speech
+
+    def process(self, data: bytes):
+        """
+        Return (blocks, ended): daftar blok yang harus diteruskan ke recognizer, dan True
+        jika segmen suara baru saja selesai (hangover habis).
+        """
+        samples = np.frombuffer(data, dtype=np.int16)
+        self.blocks_total += 1
+        self.samples_total += samples.size
+
+        if self.is_speech(samples):
+            self.last_speech = time.monotonic()
+            self._quiet = 0
+            if not self.active:
+                self.active = True
+                blocks = list(self._preroll)
+                self._preroll.clear()
+                blocks.append(data)
+                return blocks, False
+            return [data], False
+
+        if self.active:
+            self._quiet += 1
+            if self._quiet <= self.hangover:
+                return [data], False
+            self.active = False
+            self._quiet = 0
+            self._gate(data, samples)
+            return [], True
+
+        self._gate(data, samples)
+        return [], False
+
+    def _gate(self, data, samples):
+        # blok sunyi disimpan sebagai pre-roll; kalau pre-roll penuh, blok tertua benar-benar dibuang
+        if len(self._preroll) == self._preroll.maxlen or self._preroll.maxlen == 0:
+            self.blocks_gated += 1
+            self.samples_gated += samples.size
+        self._preroll.append(data)
+
+    @property
+    def gated_ratio(self) -> float:
+        return self.blocks_gated / self.blocks_total if self.blocks_total else 0.0
+
+    def stats(self, samplerate: int = 16000) -> dict:
+        return {
+            "blocks_total": self.blocks_total,
+            "blocks_gated": self.blocks_gated,
+            "gated_ratio": round(self.gated_ratio, 3),
+            "seconds_gated": round(self.samples_gated / samplerate, 2),
+            "noise_floor": round(self.noise_floor, 1),
+        }
@@ -1,67 +1,114 @@
 # src/control/drive.py
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class DummyMotor:
+    """Pengganti gpiozero.Motor untuk PC / tanpa GPIO, dengan interface yang sama."""
+
+    def __init__(self, forward=None, backward=None):
+        self.forward_pin = forward
+        self.backward_pin = backward
+        self._value = 0.0
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        value = max(-1.0, min(1.0, float(value)))
+        # log hanya saat arah berubah, bukan tiap tick ramp
+        if (value > 0) != (self._value > 0) or (value < 0) != (self._value < 0):
+            if value > 0:
+                logger.info("[DummyMotor] Forward (pin %s) speed=%.2f", self.forward_pin, value)
+            elif value < 0:
+                logger.info("[DummyMotor] Backward (pin %s) speed=%.2f", self.backward_pin, -value)
+            else:
+                logger.info("[DummyMotor] Stop (pins %s, %s)", self.forward_pin, self.backward_pin)
+        self._value = value
+
+    def forward(self, speed=1.0):
+        self.value = speed
+
+    def backward(self, speed=1.0):
+        self.value = -speed
+
+    def stop(self):
+        self.value = 0.0
+
+
 try:
     from gpiozero import Motor
     GPIO_AVAILABLE = True
 except (ImportError, RuntimeError):
     # Fallback dummy class kalau dijalankan di PC / tanpa GPIO
     GPIO_AVAILABLE = False
+    Motor = DummyMotor
 
-    class Motor:
-        def __init__(self, forward=None, backward=None):
-            self.forward_pin = forward
-            self.backward_pin = backward
-
-        def forward(self, speed=1.0):
-            print(f"[DummyMotor] Forward (pin {self.forward_pin}) speed={speed}")
-
-        def backward(self, speed=1.0):
-            print(f"[DummyMotor] Backward (pin {self.backward_pin}) speed={speed}")
 
-        def stop(self):
-            print(f"[DummyMotor] Stop (pins {self.forward_pin}, {self.backward_pin})")
-
-
-from time import sleep
+from control.motion import MotionExecutor, MotionCommand
 
 
 class DifferentialDrive:
     """
     Simple wrapper for two motors using gpiozero.Motor
     left_pins and right_pins are tuples: (forward_pin, backward_pin)
+
+    Semua perintah gerak non-blocking: dijalankan oleh MotionExecutor di thread sendiri,
+    jadi `stop()` bisa memotong gerakan berdurasi kapan saja.
     """
 
-    def __init__(self, left_pins=(17, 18), right_pins=(22, 23)):
-        self.left = Motor(forward=left_pins[0], backward=left_pins[1])
-        self.right = Motor(forward=right_pins[0], backward=right_pins[1])
+    motor_class = Motor
+
+    def __init__(self, left_pins=(17, 18), right_pins=(22, 23), rate_hz=None, ramp_rate=None,
+                 watchdog_timeout=None):
+        self.left = self.motor_class(forward=left_pins[0], backward=left_pins[1])
+        self.right = self.motor_class(forward=right_pins[0], backward=right_pins[1])
+        self.executor = MotionExecutor(
+            self.set_speeds,
+            rate_hz=rate_hz or float(os.getenv("MOTION_RATE_HZ", "50")),
+            ramp_rate=ramp_rate or float(os.getenv("MOTION_RAMP_RATE", "3.0")),
+            watchdog_timeout=watchdog_timeout if watchdog_timeout is not None
+            else float(os.getenv("MOTION_WATCHDOG", "5.0")),
+        )
 
-    def forward(self, speed=0.6, duration=None):
-        self.left.forward(speed)
-        self.right.forward(speed)
-        if duration:
-            sleep(duration)
-            self.stop()
+    def set_speeds(self, left, right):
+        """Tulis kecepatan roda langsung (-1..1). Dipanggil oleh executor tiap tick."""
+        self.left.value = left
+        self.right.value = right
 
-    def backward(self, speed=0.6, duration=None):
-        self.left.backward(speed)
-        self.right.backward(speed)
-        if duration:
-            sleep(duration)
-            self.stop()
+    def move(self, left, right, duration=None, queue=False, name=""):
+        self.executor.submit(MotionCommand(left, right, duration, name), override=not queue)
+
+    def forward(self, speed=0.6, duration=None, queue=False):
+        self.move(speed, speed, duration, queue, "forward")
+
+    def backward(self, speed=0.6, duration=None, queue=False):
+        self.move(-speed, -speed, duration, queue, "backward")
 
     def stop(self):
-        self.left.stop()
-        self.right.stop()
-
-    def turn_left(self, speed=0.5, duration=None):
-        self.left.backward(speed)
-        self.right.forward(speed)
-        if duration:
-            sleep(duration)
-            self.stop()
-
-    def turn_right(self, speed=0.5, duration=None):
-        self.left.forward(speed)
-        self.right.backward(speed)
-        if duration:
-            sleep(duration)
-            self.stop()
+        self.executor.stop()
+
+    def turn_left(self, speed=0.5, duration=None, queue=False):
+        self.move(-speed, speed, duration, queue, "turn_left")
+
+    def turn_right(self, speed=0.5, duration=None, queue=False):
+        self.move(speed, -speed, duration, queue, "turn_right")
+
+    def refresh(self):
+        self.executor.refresh()
+
+    def wait(self, timeout=None):
+        return self.executor.wait(timeout)
+
+    def close(self):
+        self.executor.close()
+
+
+class MockDrive(DifferentialDrive):
+    """DifferentialDrive dengan DummyMotor, untuk dijalankan/dites tanpa robot."""
+
+    motor_class = DummyMotor
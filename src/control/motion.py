@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MotionCommand(NamedTuple):
+    left: float  # target kecepatan roda kiri, -1..1
+    right: float  # target kecepatan roda kanan, -1..1
+    duration: Optional[float] = None  # None = terus jalan (dijaga watchdog)
+    name: str = ""
+
+
+STOP = MotionCommand(0.0, 0.0, None, "stop")
+
+
+class MotionExecutor:
+    """
+    Thread kontrol dengan tick tetap yang menjalankan MotionCommand secara non-blocking.
+    - command baru (override) langsung menggantikan command aktif, sisanya bisa diantrikan
+    - kecepatan di-ramp ke target dengan `ramp_rate` (unit kecepatan per detik)
+    - stop tidak di-ramp: motor langsung 0 pada tick berikutnya
+    - watchdog: command tanpa durasi berhenti kalau tidak di-refresh dalam `watchdog_timeout`
+    """
+
+    def __init__(self, apply_fn, rate_hz: float = 50.0, ramp_rate: float = 3.0,
+                 watchdog_timeout: Optional[float] = 5.0):
+        self.apply_fn = apply_fn  # apply_fn(left, right)
+        self.period = 1.0 / rate_hz
+        self.ramp_rate = ramp_rate
+        self.watchdog_timeout = watchdog_timeout
+
+        self.left = 0.0
+        self.right = 0.0
+        self.current = STOP
+        self._deadline = None
+        self._last_refresh = time.monotonic()
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._running = True
+        self.watchdog_trips = 0
+        self.on_command = None  # callback(cmd, ts) opsional, tiap command mulai aktif (flight recorder)
+
+        self._thread = threading.Thread(target=self._loop, name="motion-executor", daemon=True)
+        self._thread.start()
+
+    # ---------- API (dipanggil dari thread mana saja, selalu langsung return) ----------
+    def submit(self, cmd: MotionCommand, override: bool = True):
+        with self._lock:
+            if override:
+                self._queue.clear()
+                self._activate(cmd)
+            else:
+                self._queue.append(cmd)
+            self._last_refresh = time.monotonic()
+            self._idle.clear()
+        self._wake.set()
+
+    def stop(self):
+        self.submit(STOP, override=True)
+
+    def refresh(self):
+        """Heartbeat dari pemanggil yang memberi command kontinu (mis. loop navigasi)."""
+        self._last_refresh = time.monotonic()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Tunggu sampai semua command selesai dan robot diam."""
+        return self._idle.wait(timeout)
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=1.0)
+        self.apply_fn(0.0, 0.0)
+
+    # ---------- control thread ----------
+    def _activate(self, cmd):
+        now = time.monotonic()
+        self.current = cmd
+        self._deadline = now + cmd.duration if cmd.duration else None
+        if self.on_command:
+            self.on_command(cmd, now)
+
+    def _loop(self):
+        last = time.monotonic()
+        while self._running:
+            # saat diam, thread tidur sampai ada command baru
+            self._wake.wait(None if self._idle.is_set() else self.period)
+            self._wake.clear()
+            now = time.monotonic()
+            dt = min(now - last, self.period)
+            last = now
+
+            with self._lock:
+                cmd = self.current
+                if self._deadline is not None and now >= self._deadline:
+                    # command berdurasi selesai -> command berikutnya di antrean, atau berhenti
+                    if self._queue:
+                        self._activate(self._queue.popleft())
+                    else:
+                        self._activate(STOP)
+                    cmd = self.current
+                elif cmd is STOP and self._queue:
+                    self._activate(self._queue.popleft())
+                    cmd = self.current
+
+                if (cmd.duration is None and cmd is not STOP and self.watchdog_timeout
+                        and now - self._last_refresh > self.watchdog_timeout):
+                    self.watchdog_trips += 1
+                    logger.warning("Watchdog: no command refresh for %.1fs, stopping", self.watchdog_timeout)
+                    self._queue.clear()
+                    self._activate(STOP)
+                    cmd = self.current
+
+            if cmd is STOP or (cmd.left == 0.0 and cmd.right == 0.0):
+                left, right = 0.0, 0.0
+            else:
+                step = self.ramp_rate * dt
+                left = self._ramp(self.left, cmd.left, step)
+                right = self._ramp(self.right, cmd.right, step)
+
+            if left != self.left or right != self.right:
+                self.left, self.right = left, right
+                try:
+                    self.apply_fn(left, right)
+                except Exception as e:
+                    logger.error("Failed to apply motor speeds: %s", e)
+
+            if cmd is STOP and left == 0.0 and right == 0.0 and not self._queue:
+                self._idle.set()
+
+    @staticmethod
+    def _ramp(current, target, step):
+        if abs(target - current) <= step:
+            return target
+        return current + step if target > current else current - step
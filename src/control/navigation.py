@@ -0,0 +1,227 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NavDecision(NamedTuple):
+    left: float
+    right: float
+    reason: str
+    clearance: tuple  # (kiri, tengah, kanan), 0 = terhalang .. 1 = bebas
+    frame_age: float
+    det_age: float
+
+
+def free_space(frame, size=(80, 60), canny=(50, 150), columns=3):
+    """
+    Estimasi ruang kosong di lantai dari frame kecil: untuk tiap kolom piksel, jarak dari
+    bawah frame sampai edge pertama (kontur obstacle). Return clearance per kolom (0..1).
+    """
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(gray, *canny)
+
+    # hanya setengah bawah (lantai), dibalik supaya baris 0 = paling dekat robot
+    floor = edges[edges.shape[0] // 2:][::-1] > 0
+    rows = floor.shape[0]
+    first = np.where(floor.any(axis=0), floor.argmax(axis=0), rows)
+    free = first.astype(np.float32) / rows
+    return tuple(float(c.mean()) for c in np.array_split(free, columns))
+
+
+def detection_clearance(boxes, shape, columns=3, horizon=0.5):
+    """Clearance per kolom dari box xyxy: box yang bagian bawahnya dekat bawah frame = dekat."""
+    clear = np.ones(columns, dtype=np.float32)
+    if boxes is None or not len(boxes):
+        return clear
+    h, w = shape[:2]
+    edges = np.linspace(0, w, columns + 1)
+    for x1, y1, x2, y2 in boxes:
+        bottom = y2 / h
+        if bottom < horizon:
+            continue  # objek jauh / di atas horizon
+        closeness = (bottom - horizon) / (1.0 - horizon)
+        for c in range(columns):
+            if x2 > edges[c] and x1 < edges[c + 1]:
+                clear[c] = min(clear[c], 1.0 - closeness)
+    return clear
+
+
+class Navigator:
+    """
+    Loop navigasi reaktif: dari clearance (kontur + deteksi) hitung kecepatan roda.
+    Batas latensi end-to-end ditegakkan: kalau data persepsi lebih tua dari `max_latency`
+    robot melambat, lebih dari 2x batas robot berhenti. Latensi tiap siklus direkam ke
+    `tracer` (nav.frame_age / nav.det_age / nav.compute) kalau diberikan.
+    """
+
+    def __init__(self, drive=None, rate_hz: float = 10.0, cruise_speed: float = 0.5, turn_speed: float = 0.45,
+                 max_latency: float = 0.3, det_max_age: float = 1.0, safe_clearance: float = 0.45,
+                 stop_clearance: float = 0.15, steer_gain: float = 0.4, history: int = 300, tracer=None):
+        self.drive = drive
+        self.tracer = tracer
+        self.period = 1.0 / rate_hz
+        self.cruise_speed = cruise_speed
+        self.turn_speed = turn_speed
+        self.max_latency = max_latency
+        self.det_max_age = det_max_age
+        self.safe_clearance = safe_clearance
+        self.stop_clearance = stop_clearance
+        self.steer_gain = steer_gain
+
+        self.enabled = threading.Event()
+        self._lock = threading.Lock()  # command nav tidak pernah menimpa command manual sesudah disable()
+        self.cycles = deque(maxlen=history)  # (frame_age, det_age, compute_s, reason)
+        self.deadline_misses = 0
+
+    def decide(self, frame, frame_ts, boxes, det_ts, now=None) -> NavDecision:
+        """
+        Fungsi murni (tanpa menggerakkan motor), bisa dites dengan frame rekaman.
+        `boxes`: box xyxy obstacle (track SceneState, atau Detections.boxes saat replay).
+        """
+        now = time.monotonic() if now is None else now
+        frame_age = now - frame_ts if frame_ts else float("inf")
+        det_age = now - det_ts if det_ts else float("inf")
+
+        if frame is None or frame_age > 2 * self.max_latency:
+            self.deadline_misses += 1
+            return NavDecision(0.0, 0.0, "stale_frame", (0.0, 0.0, 0.0), frame_age, det_age)
+
+        clear = np.minimum(free_space(frame), detection_clearance(boxes, frame.shape))
+        cl, cc, cr = (float(c) for c in clear)
+
+        # faktor kecepatan dari umur data: penuh s.d. setengah budget, turun linear ke 0.3
+        scale = 1.0
+        if frame_age > self.max_latency / 2:
+            scale = max(0.3, 1.0 - (frame_age - self.max_latency / 2) / self.max_latency)
+        if det_age > self.det_max_age:
+            scale *= 0.5  # deteksi objek basi: jalan pelan, andalkan kontur
+
+        if max(cl, cc, cr) < self.stop_clearance:
+            # terjebak: putar di tempat ke sisi yang lebih lega
+            t = self.turn_speed * scale
+            left, right, reason = (t, -t, "spin_right") if cr >= cl else (-t, t, "spin_left")
+        elif cc < self.safe_clearance:
+            t = self.turn_speed * scale
+            left, right, reason = (t, -t, "avoid_right") if cr >= cl else (-t, t, "avoid_left")
+        else:
+            v = self.cruise_speed * scale * min(1.0, cc / max(self.safe_clearance * 2, 1e-6))
+            w = self.steer_gain * (cr - cl) * v
+            left, right, reason = v + w, v - w, "cruise"
+
+        return NavDecision(
+            float(np.clip(left, -1, 1)), float(np.clip(right, -1, 1)), reason, (cl, cc, cr), frame_age, det_age
+        )
+
+    def enable(self):
+        self.enabled.set()
+
+    def disable(self):
+        """Matikan navigasi. Setelah return, loop tidak akan mengirim command lagi."""
+        with self._lock:
+            self.enabled.clear()
+
+    def _release(self):
+        # hentikan motor hanya kalau yang sedang jalan masih command navigasi
+        with self._lock:
+            current = getattr(getattr(self.drive, "executor", None), "current", None)
+            if current is None or current.name.startswith("nav:"):
+                self.drive.stop()
+
+    def step(self, frame, frame_ts, boxes, det_ts):
+        start = time.monotonic()
+        decision = self.decide(frame, frame_ts, boxes, det_ts, now=start)
+        if self.drive is not None:
+            with self._lock:
+                if self.enabled.is_set():
+                    self.drive.move(decision.left, decision.right, name=f"nav:{decision.reason}")
+        compute = time.monotonic() - start
+        self.cycles.append((decision.frame_age, decision.det_age, compute, decision.reason))
+        if self.tracer is not None:
+            for name, value in (("frame_age", decision.frame_age), ("det_age", decision.det_age), ("compute", compute)):
+                if math.isfinite(value):
+                    self.tracer.record(f"nav.{name}", value)
+        return decision
+
+    def run(self, cam, scene_state, stop_event):
+        """Loop dengan rate tetap; membaca frame terbaru dari Camera dan snapshot SceneState."""
+        last_seq = -1
+        buf = None  # buffer milik navigator, dipakai ulang tiap frame
+        next_tick = time.monotonic()
+        was_enabled = False
+        while not stop_event.is_set():
+            next_tick += self.period
+            if self.enabled.is_set():
+                packet = cam.read_latest(after_seq=last_seq, timeout=self.period, out=buf)
+                if packet is not None:
+                    last_seq = packet.seq
+                    buf = packet.frame
+                    # track (bukan deteksi mentah): satu frame yang miss tidak membuat setir goyang
+                    snap = scene_state.snapshot()
+                    self.step(buf, packet.timestamp, [o.box for o in snap.objects], snap.timestamp)
+                else:
+                    self.step(None, None, None, None)
+                was_enabled = True
+            elif was_enabled:
+                was_enabled = False
+                if self.drive is not None:
+                    self._release()
+                logger.info("🧭 Navigation stopped: %s", self.metrics())
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # tertinggal, jangan kejar tick yang lewat
+
+    def metrics(self) -> dict:
+        """Persentil latensi per siklus (detik) untuk dipantau."""
+        if not self.cycles:
+            return {}
+        data = np.array([(f, d, c) for f, d, c, _ in self.cycles], dtype=np.float64)
+        data[~np.isfinite(data)] = np.nan
+        out = {"cycles": len(self.cycles), "deadline_misses": self.deadline_misses}
+        for i, name in enumerate(("frame_age", "det_age", "compute")):
+            col = data[:, i]
+            col = col[~np.isnan(col)]
+            if col.size:
+                out[name] = {p: round(float(np.percentile(col, q)), 4) for p, q in (("p50", 50), ("p95", 95), ("max", 100))}
+        return out
+
+
+if __name__ == "__main__":
+    # Replay video rekaman lewat Scene + Navigator (tanpa motor) untuk cek perilaku & timing.
+    import argparse
+    import json
+    import sys
+    import os
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from vision.scene import Scene
+
+    parser = argparse.ArgumentParser(description="Replay video ke loop navigasi")
+    parser.add_argument("video")
+    parser.add_argument("--no-yolo", action="store_true", help="hanya pakai estimasi kontur")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    scene = None if args.no_yolo else Scene()
+    nav = Navigator()
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        ts = time.monotonic()
+        dets = scene.detect(frame)[1] if scene else None
+        d = nav.step(frame, ts, dets.boxes if dets is not None else None, ts)
+        print(json.dumps({"reason": d.reason, "left": round(d.left, 2), "right": round(d.right, 2),
+                          "clearance": [round(c, 2) for c in d.clearance], "age": round(d.frame_age, 3)}))
+    print(json.dumps(nav.metrics()))
@@ -0,0 +1,165 @@
+import logging
+import queue
+import sqlite3
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    # kira-kira 4 karakter per token (cukup untuk budgeting, tanpa tiktoken)
+    return len(text) // 4 + 4
+
+
+class ConversationHistory:
+    """
+    Window percakapan di memori (deque terbatas) dengan persistensi SQLite write-behind.
+    Baca history = baca memori; INSERT dikumpulkan dan ditulis batch oleh thread writer
+    (executemany + WAL), jadi request path tidak pernah menunggu fsync SD card.
+    """
+
+    def __init__(self, db_path: str, max_history: int = 20, max_tokens: int = 2000,
+                 flush_interval: float = 1.0, batch_size: int = 32):
+        self.db_path = db_path
+        self.max_tokens = max_tokens
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.system = None
+        self._messages = deque(maxlen=max_history)
+        self._lock = threading.Lock()
+
+        self._pending = queue.Queue()
+        self._stop = threading.Event()
+
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self):
+        """Isi window dari pesan terakhir di DB (urut lama -> baru)."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT role, content FROM messages WHERE role != 'system' ORDER BY id DESC LIMIT ?",
+            (self._messages.maxlen,)
+        ).fetchall()
+        system = conn.execute(
+            "SELECT role, content FROM messages WHERE role = 'system' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        conn.close()
+        with self._lock:
+            self._messages.clear()
+            self._messages.extend({"role": r, "content": c} for r, c in reversed(rows))
+            if system:
+                self.system = {"role": system[0], "content": system[1]}
+
+    # ---------- write path ----------
+    def append(self, role: str, content: str):
+        msg = {"role": role, "content": content}
+        with self._lock:
+            if role == "system":
+                self.system = msg
+            else:
+                self._messages.append(msg)
+        self._pending.put(("insert", (role, content)))
+
+    def clear(self):
+        with self._lock:
+            self._messages.clear()
+            self.system = None
+        self._pending.put(("clear", None))
+
+    def discard(self, role: str, content: str):
+        """Hapus pesan terakhir dengan role & isi ini (turn yang dibatalkan), di memori dan di DB."""
+        with self._lock:
+            for i in range(len(self._messages) - 1, -1, -1):
+                msg = self._messages[i]
+                if msg["role"] == role and msg["content"] == content:
+                    del self._messages[i]
+                    break
+            else:
+                return
+        self._pending.put(("discard", (role, content)))
+
+    def _write_loop(self):
+        conn = self._connect()
+        while not self._stop.is_set() or not self._pending.empty():
+            try:
+                op, arg = self._pending.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while True:
+                if op == "insert":
+                    batch.append(arg)
+                else:
+                    # urutan dijaga: insert yang sudah antre ditulis dulu
+                    self._flush(conn, batch)
+                    batch = []
+                    if op == "clear":
+                        conn.execute("DELETE FROM messages")
+                    else:
+                        conn.execute("DELETE FROM messages WHERE id = (SELECT MAX(id) FROM messages "
+                                     "WHERE role = ? AND content = ?)", arg)
+                    conn.commit()
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    op, arg = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+            self._flush(conn, batch)
+        conn.close()
+
+    @staticmethod
+    def _flush(conn, batch):
+        if not batch:
+            return
+        try:
+            conn.executemany("INSERT INTO messages (role, content) VALUES (?, ?)", batch)
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error("Failed to persist chat history: %s", e)
+
+    def close(self):
+        self._stop.set()
+        self._writer.join(timeout=5)
+
+    # ---------- read path ----------
+    def window(self):
+        """System prompt + turn terbaru yang muat dalam max_tokens."""
+        with self._lock:
+            messages = list(self._messages)
+            system = self.system
+
+        budget = self.max_tokens - (estimate_tokens(system["content"]) if system else 0)
+        kept = []
+        for msg in reversed(messages):
+            cost = estimate_tokens(msg["content"])
+            if kept and cost > budget:
+                break
+            kept.append(msg)
+            budget -= cost
+        kept.reverse()
+        return ([system] if system else []) + kept
+
+    def __len__(self):
+        return len(self._messages)
@@ -0,0 +1,236 @@
+import re
+from collections import Counter
+from typing import NamedTuple, Optional
+
+
+class Intent(NamedTuple):
+    name: str
+    lang: str  # "id" / "en", diambil dari frasa yang cocok
+    slots: dict
+
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "satu": 1, "dua": 2, "tiga": 3, "empat": 4, "lima": 5, "enam": 6, "tujuh": 7, "delapan": 8, "sembilan": 9,
+    "sepuluh": 10, "a": 1, "an": 1, "se": 1,
+}
+
+SPEEDS = {"slow": 0.4, "normal": 0.6, "fast": 0.9}
+
+# nama objek bahasa Indonesia / jamak -> label COCO
+LABEL_ALIASES = {
+    "people": "person", "persons": "person", "orang": "person", "manusia": "person",
+    "kursi": "chair", "meja": "dining table", "mobil": "car", "motor": "motorcycle", "botol": "bottle",
+    "kucing": "cat", "anjing": "dog", "gelas": "cup", "cangkir": "cup", "hp": "cell phone",
+    "phone": "cell phone", "phones": "cell phone", "ponsel": "cell phone", "tv": "tv", "televisi": "tv",
+    "buku": "book", "tas": "backpack", "sofa": "couch", "tanaman": "potted plant", "sepeda": "bicycle",
+    "buses": "bus", "mice": "mouse", "knives": "knife",
+}
+
+# satu kata, atau dua kata untuk label COCO seperti "cell phone", "dining table"
+_OBJ = r"(?P<object>[a-z]+(?: (?:phone|table|plant|light|glass|bear|dryer|brush|bat|glove|hydrant|sign|meter)s?)?)"
+
+_NUM = r"(\d+(?:[.,]\d+)?|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")"
+
+# (intent, lang, pattern). Urutan = prioritas; stop selalu dicek duluan.
+_GRAMMAR = [
+    ("stop", "id", r"\b(berhenti|stop dulu|diam|jangan (?:jalan|bergerak))\b"),
+    ("stop", "en", r"\b(stop|halt|freeze|stay still|don'?t move)\b"),
+    ("backward", "id", r"\b(mundur|jalan mundur|ke belakang)\b"),
+    ("backward", "en", r"\b(go back(?:wards?)?|move back(?:wards?)?|backwards?|reverse)\b"),
+    ("turn_left", "id", r"\b(belok kiri|putar kiri|ke kiri|hadap kiri)\b"),
+    ("turn_left", "en", r"\b(turn left|go left|rotate left|to the left)\b"),
+    ("turn_right", "id", r"\b(belok kanan|putar kanan|ke kanan|hadap kanan)\b"),
+    ("turn_right", "en", r"\b(turn right|go right|rotate right|to the right)\b"),
+    ("explore", "id", r"\b(jelajah(?:i)?|jalan-jalan|mode otomatis)\b"),
+    ("explore", "en", r"\b(explore|autopilot|auto mode|wander around)\b"),
+    ("forward", "id", r"\b(maju|jalan terus|ke depan)\b"),
+    ("forward", "en", r"\b(forward|go ahead|move ahead|go straight)\b"),
+    ("flight_dump", "id", r"\b(simpan rekaman|simpan log|laporkan (?:bug|masalah))\b"),
+    ("flight_dump", "en", r"\b(save (?:the )?(?:flight )?(?:recording|recorder|log)|report (?:a )?(?:bug|problem))\b"),
+    ("scene_describe", "id", r"\b(apa yang (?:kamu|kau|anda) lihat|lihat apa|kamu lihat apa|ada apa(?: saja)?(?: di)?(?: sekitar| depan)?)\b"),
+    ("scene_describe", "en", r"\b(what (?:do|can) you see|what'?s around|what is around|describe (?:the )?(?:scene|room|surroundings)|look around|what'?s in front of you)\b"),
+    ("scene_count", "id", r"\b(?:berapa(?: banyak)?|ada berapa) " + _OBJ),
+    ("scene_count", "en", r"\bhow many " + _OBJ),
+    ("scene_presence", "id", r"^(?:apakah )?ada " + _OBJ),
+    ("scene_presence", "en", r"\b(?:is there an?|are there(?: any)?|do you see an?y?) " + _OBJ),
+]
+
+_DURATION = re.compile(r"\b" + _NUM + r"\s*(?:seconds?|secs?|detik)\b")
+_PERCENT = re.compile(r"(\d+)\s*(?:percent|persen|%)")
+_SLOW = re.compile(r"\b(slow(?:ly)?|pelan(?:-pelan)?|lambat)\b")
+_FAST = re.compile(r"\b(fast|quick(?:ly)?|cepat|kencang)\b")
+
+DRIVE_INTENTS = {"stop", "forward", "backward", "turn_left", "turn_right", "explore"}
+
+# Perintah gerak harus berbentuk perintah: sebelum frasa kerja hanya boleh kata sapaan/pengantar,
+# sesudahnya hanya kata slot (durasi, kecepatan) atau pelengkap. "reverse the list" atau
+# "what is a forward pass" tidak menggerakkan roda. Stop sengaja tidak dijaga: salah berhenti aman.
+_QUESTION_WORDS = {
+    "what", "what's", "whats", "how", "why", "when", "where", "who", "which", "is", "are", "can", "could",
+    "do", "does", "did", "should", "would", "will", "apa", "apakah", "bagaimana", "gimana", "kenapa",
+    "mengapa", "kapan", "dimana", "siapa", "berapa", "bisakah",
+}
+_NEGATIONS = {"don't", "dont", "not", "never", "no", "jangan", "tidak", "tak", "bukan", "nggak", "gak", "enggak"}
+_COMMAND_PREFIX = {
+    "please", "tolong", "robot", "ok", "okay", "hey", "now", "sekarang", "ayo", "coba", "yuk", "then", "lalu",
+    "and", "dan", "go", "move", "keep", "drive", "jalan", "bergerak",
+}
+_COMMAND_SUFFIX = {
+    "please", "tolong", "now", "sekarang", "dong", "ya", "again", "lagi", "a", "bit", "little", "sedikit", "more",
+    "for", "selama", "at", "with", "dengan", "speed", "kecepatan", "seconds", "second", "secs", "sec", "detik",
+    "percent", "persen", "slow", "slowly", "pelan", "lambat", "fast", "quick", "quickly", "cepat", "kencang",
+    "the", "room", "area", "around", "ruangan", "sekitar", "ini",
+}
+_WORD = re.compile(r"[a-z0-9']+(?:[.,]\d+)?%?")
+
+# Kosakata untuk recognizer Vosk ber-grammar. Semua frasa di sini juga cocok dengan _GRAMMAR.
+# Kata yang tidak ada di model Vosk (mis. kata Indonesia di model EN) diabaikan oleh Vosk.
+COMMAND_PHRASES = [
+    "stop", "halt", "berhenti",
+    "forward", "go forward", "move forward", "go ahead", "maju",
+    "go back", "backward", "move back", "reverse", "mundur",
+    "turn left", "go left", "belok kiri",
+    "turn right", "go right", "belok kanan",
+    "explore", "autopilot", "jelajah",
+    "save recording", "simpan rekaman",
+]
+
+
+def _number(token: str) -> Optional[float]:
+    if token in NUMBER_WORDS:
+        return float(NUMBER_WORDS[token])
+    try:
+        return float(token.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def normalize_label(word: str) -> str:
+    word = word.strip().lower()
+    if word in LABEL_ALIASES:
+        return LABEL_ALIASES[word]
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]  # glasses -> glass, benches -> bench, boxes -> box
+    if word.endswith("s") and len(word) > 3:
+        return LABEL_ALIASES.get(word[:-1], word[:-1])
+    return word
+
+
+class IntentMatcher:
+    """
+    Grammar frasa dua bahasa (EN/ID) yang sudah di-compile untuk perintah robot dan
+    pertanyaan tentang scene. Yang tidak cocok dikembalikan None -> diteruskan ke LLM.
+    """
+
+    def __init__(self, max_command_words: int = 8):
+        # perintah gerak hanya dari kalimat pendek, supaya obrolan tidak menggerakkan roda
+        self.max_command_words = max_command_words
+        self._grammar = [(name, lang, re.compile(p)) for name, lang, p in _GRAMMAR]
+
+    def match(self, text: str) -> Optional[Intent]:
+        text = text.lower().strip()
+        if not text:
+            return None
+        n_words = len(text.split())
+
+        for name, lang, pattern in self._grammar:
+            if name in DRIVE_INTENTS and name != "stop" and n_words > self.max_command_words:
+                continue
+            m = pattern.search(text)
+            if not m:
+                continue
+            if name in DRIVE_INTENTS and name != "stop" and not self._is_command(text, m):
+                continue
+            slots = {}
+            if name in DRIVE_INTENTS:
+                slots = self._drive_slots(text)
+            elif "object" in pattern.groupindex:
+                slots["object"] = normalize_label(m.group("object"))
+            return Intent(name, lang, slots)
+        return None
+
+    @staticmethod
+    def _is_command(text, m) -> bool:
+        """Frasa kerja di awal kalimat (setelah kata pengantar), bukan pertanyaan / negasi."""
+        if "?" in text:
+            return False
+        before = _WORD.findall(text[:m.start()])
+        after = _WORD.findall(text[m.end():])
+        first = (before or _WORD.findall(m.group(0)))[:1]
+        if first and first[0] in _QUESTION_WORDS:
+            return False
+        if any(w in _NEGATIONS for w in before):
+            return False
+        if not all(w in _COMMAND_PREFIX for w in before):
+            return False
+        return all(w in _COMMAND_SUFFIX or _number(w.rstrip("%")) is not None for w in after)
+
+    @staticmethod
+    def _drive_slots(text):
+        slots = {}
+        m = _DURATION.search(text)
+        if m:
+            seconds = _number(m.group(1))
+            if seconds:
+                slots["duration"] = min(seconds, 30.0)
+        m = _PERCENT.search(text)
+        if m:
+            slots["speed"] = max(0.1, min(1.0, int(m.group(1)) / 100.0))
+        elif _SLOW.search(text):
+            slots["speed"] = SPEEDS["slow"]
+        elif _FAST.search(text):
+            slots["speed"] = SPEEDS["fast"]
+        return slots
+
+
+# =====================
+# Templated replies
+# =====================
+def _plural(label, n, lang):
+    if lang == "id" or n == 1:
+        return label
+    if label == "person":
+        return "people"
+    return label + ("es" if label.endswith(("s", "sh", "ch")) else "s")
+
+
+def _join(items, lang):
+    if len(items) <= 1:
+        return "".join(items)
+    conj = " dan " if lang == "id" else " and "
+    return ", ".join(items[:-1]) + conj + items[-1]
+
+
+def _count_phrase(label, n, lang):
+    if lang == "id":
+        return f"{n} {label}"
+    return f"{'a' if n == 1 and label[0] not in 'aeiou' else 'an' if n == 1 else n} {_plural(label, n, lang)}"
+
+
+def describe_objects(objects, lang="en"):
+    counts = Counter(o.label for o in objects)
+    if not counts:
+        return "Saya tidak melihat apa-apa di depan saya." if lang == "id" else "I don't see anything in front of me."
+    items = [_count_phrase(label, n, lang) for label, n in counts.most_common()]
+    if lang == "id":
+        return f"Saya melihat {_join(items, lang)}."
+    return f"I see {_join(items, lang)}."
+
+
+def count_reply(objects, label, lang="en"):
+    n = sum(1 for o in objects if o.label == label)
+    if lang == "id":
+        return f"Saya melihat {n} {label}." if n else f"Saya tidak melihat {label}."
+    if n == 0:
+        return f"I don't see any {_plural(label, 2, lang)}."
+    return f"I see {_count_phrase(label, n, lang)}."
+
+
+def presence_reply(objects, label, lang="en"):
+    n = sum(1 for o in objects if o.label == label)
+    if lang == "id":
+        return f"Ya, ada {n} {label}." if n else f"Tidak, saya tidak melihat {label}."
+    if n:
+        return f"Yes, I see {_count_phrase(label, n, lang)}."
+    return f"No, I don't see any {_plural(label, 2, lang)}."
@@ -1,13 +1,192 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
 import os
+import queue
+import random
+import re
 import sqlite3
-from openai import OpenAI, APIError, APIConnectionError, RateLimitError
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+from openai import (AsyncOpenAI, AsyncStream, DefaultAsyncHttpxClient, APIError, APIConnectionError,
+                    APITimeoutError, InternalServerError, RateLimitError)
+
+from llm.history import ConversationHistory
 
 DB_PATH = "chat_history.db"
 
+logger = logging.getLogger(__name__)
+
+# error yang layak dicoba ulang (jaringan putus sebentar, 429, 5xx)
+RETRYABLE = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+
+# prepare_user_message() menambahkan konteks scene setelah penanda ini
+SCENE_MARKER = ". Scene: "
+
+# Pertanyaan yang jawabannya boleh diambil dari cache. Yang tidak cocok (personal,
+# bergantung percakapan sebelumnya) selalu ke API. Aktif/nonaktif lewat LLM_CACHE_INTENTS.
+CACHEABLE_INTENTS = {
+    "identity": re.compile(r"\b(what is your name|whats your name|who are you|siapa (nama ?mu|kamu)|nama (kamu|mu) siapa)\b"),
+    "greeting": re.compile(r"^(hi|hello|hey|halo|hai|good (morning|afternoon|evening))$|\b(how are you|apa kabar)\b"),
+    "joke": re.compile(r"\b(tell me a joke|another joke|say something funny|lelucon|cerita lucu)\b"),
+    "capabilities": re.compile(r"\b(what can you do|bisa apa( saja)?|kamu bisa apa)\b"),
+    "scene": re.compile(r"\b(what (do|can) you see|what is around|whats around|describe the (scene|room)|apa yang (kamu )?lihat)\b"),
+}
+
+# kata basa-basi yang tidak mengubah maksud pertanyaan. Sapaan (hi/hey/halo) sengaja tidak
+# di sini: untuk intent greeting, sapaan itu sendiri adalah pertanyaannya.
+_FILLER = {"please", "karen", "robot", "ok", "okay", "tolong", "dong", "ya", "sih", "deh"}
+
+
+def normalize_prompt(text: str) -> str:
+    words = re.sub(r"[^\w\s]", "", text.lower()).split()
+    return " ".join(w for w in words if w not in _FILLER)
+
+
+class ResponseCache:
+    """
+    Cache jawaban LLM untuk pertanyaan yang sering diulang, key = (model, teks ter-normalisasi,
+    digest scene). LRU + TTL di memori, dipersist ke tabel response_cache di file SQLite yang
+    sama dengan history. Hanya intent di `intents` yang di-cache.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 256, ttl: float = 24 * 3600, intents=None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.intents = {name: CACHEABLE_INTENTS[name] for name in (intents or CACHEABLE_INTENTS)
+                        if name in CACHEABLE_INTENTS}
+        self._entries = OrderedDict()  # key -> [response, created, last_used], paling lama dipakai di depan
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # pertanyaan yang tidak boleh di-cache
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                intent TEXT,
+                prompt TEXT,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("DELETE FROM response_cache WHERE created < ?", (time.time() - ttl,))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT key, response, created, last_used FROM response_cache ORDER BY last_used DESC LIMIT ?",
+            (max_entries,)
+        ).fetchall()
+        for key, response, created, last_used in reversed(rows):
+            self._entries[key] = [response, created, last_used]
+
+    @classmethod
+    def from_env(cls, db_path):
+        if os.getenv("LLM_CACHE", "0") != "1":
+            return None
+        intents = [i.strip() for i in os.getenv("LLM_CACHE_INTENTS", ",".join(CACHEABLE_INTENTS)).split(",")
+                   if i.strip()]
+        return cls(
+            db_path,
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+            intents=intents,
+        )
+
+    def key(self, content: str, model: str):
+        """Return (key, intent, prompt) atau None kalau pertanyaan ini tidak boleh di-cache."""
+        text, _, scene = content.partition(SCENE_MARKER)
+        prompt = normalize_prompt(text)
+        intent = next((name for name, pattern in self.intents.items() if pattern.search(prompt)), None)
+        if intent is None:
+            self.skipped += 1
+            return None
+        scene_digest = hashlib.sha1(" ".join(scene.split()).encode("utf-8")).hexdigest()[:12] if scene else ""
+        key = hashlib.sha1(f"{model}\0{prompt}\0{scene_digest}".encode("utf-8")).hexdigest()
+        return key, intent, prompt
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[1] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            entry[2] = now
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, intent, prompt, response):
+        """Simpan jawaban; dipanggil di executor supaya commit SQLite tidak di jalur request."""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = [response, now, now]
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, intent, prompt, response, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (key, intent, prompt, response, now, now))
+                if evicted:
+                    self._conn.executemany("DELETE FROM response_cache WHERE key = ?", [(k,) for k in evicted])
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error("Failed to persist response cache: %s", e)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def close(self):
+        # simpan urutan LRU (last_used) supaya bertahan setelah restart
+        with self._lock:
+            rows = [(entry[2], key) for key, entry in self._entries.items()]
+            try:
+                self._conn.executemany("UPDATE response_cache SET last_used = ? WHERE key = ?", rows)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error("Failed to persist response cache: %s", e)
+            self._conn.close()
+
+
 class LLMClient:
-    def __init__(self, api_key: str = None, max_history: int = 20, clear_on_start=True, system_prompt=None):
+    """
+    Client OpenAI berbasis asyncio yang berjalan di event loop thread sendiri. Satu koneksi HTTP
+    di-pool dan dipakai ulang antar turn; tiap request punya deadline dan retry dengan jitter.
+    Untuk streaming, deadline berlaku sampai token pertama; sesudahnya jawaban panjang boleh
+    berjalan terus selama jeda antar delta tidak melebihi `idle_timeout`.
+    Request yang sedang berjalan bisa dibatalkan dari thread lain lewat cancel() (barge-in).
+    chat() / chat_stream() adalah facade sinkron untuk worker thread.
+    """
+
+    def __init__(self, api_key: str = None, max_history: int = 20, clear_on_start=True, system_prompt=None,
+                 max_context_tokens: int = None, deadline: float = None, retries: int = None,
+                 idle_timeout: float = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.max_history = max_history
+        self.max_context_tokens = max_context_tokens or int(os.getenv("LLM_MAX_CONTEXT_TOKENS", "2000"))
+        self.deadline = deadline or float(os.getenv("LLM_DEADLINE", "10"))
+        self.idle_timeout = idle_timeout or float(os.getenv("LLM_IDLE_TIMEOUT", "5"))
+        self.retries = retries if retries is not None else int(os.getenv("LLM_RETRIES", "2"))
         self.system_prompt = (
             "You are a friendly robot assistant named Karen. "
             "You always respond in a natural, human-like way. "
@@ -18,70 +197,307 @@ class LLMClient:
             "Actually you can see scene using camera."
         )
 
+        # event loop di thread sendiri; worker sinkron submit coroutine ke sini
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="llm-loop", daemon=True)
+        self._loop_thread.start()
+        self._inflight = None
+        self._inflight_lock = threading.Lock()
+
         if not self.api_key:
-            print("[Warning] OPENAI_API_KEY not set, using DummyLLMClient")
+            logger.warning("OPENAI_API_KEY not set, using DummyLLMClient")
             self.client = None
         else:
-            self.client = OpenAI(api_key=self.api_key)
+            keepalive = float(os.getenv("LLM_KEEPALIVE", "300"))
+            self.client = AsyncOpenAI(
+                api_key=self.api_key,
+                max_retries=0,  # retry diatur sendiri supaya menghormati deadline
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=1, max_keepalive_connections=1, keepalive_expiry=keepalive),
+                ),
+            )
 
-        # DB setup
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        self._init_db()
+        # history: window di memori, ditulis ke SQLite di background
+        self.history = ConversationHistory(DB_PATH, max_history=max_history, max_tokens=self.max_context_tokens)
         if clear_on_start:
             self.clear_history()
+        else:
+            self.history.load()
 
         # simpan system prompt
         self._add_message("system", self.system_prompt)
 
-    def _init_db(self):
-        c = self.conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        self.conn.commit()
+        # opt-in (LLM_CACHE=1): jawaban pertanyaan berulang tanpa round-trip ke API
+        self.cache = ResponseCache.from_env(DB_PATH)
 
     def clear_history(self):
-        c = self.conn.cursor()
-        c.execute("DELETE FROM messages")
-        self.conn.commit()
-        print("[LLMClient] Chat history cleared")
+        self.history.clear()
+        logger.info("Chat history cleared")
 
     def _add_message(self, role: str, content: str):
-        c = self.conn.cursor()
-        c.execute("INSERT INTO messages (role, content) VALUES (?, ?)", (role, content))
-        self.conn.commit()
+        self.history.append(role, content)
 
     def _get_history(self):
-        c = self.conn.cursor()
-        c.execute(f"SELECT role, content FROM messages ORDER BY id ASC LIMIT {self.max_history}")
-        rows = c.fetchall()
-        return [{"role": r[0], "content": r[1]} for r in rows]
+        return self.history.window()
+
+    def _rollback(self, messages):
+        # turn yang dibatalkan: jangan tinggalkan pesan user tanpa jawaban di history
+        for m in reversed(messages):
+            self.history.discard(m["role"], m["content"])
+
+    # =====================
+    # Async API
+    # =====================
+    async def _with_retry(self, make_request, deadline):
+        """Panggil make_request() sampai berhasil, error non-transient, atau deadline habis."""
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise APITimeoutError(request=None)
+            task = asyncio.ensure_future(make_request())
+            try:
+                done, _ = await asyncio.wait({task}, timeout=remaining)
+            except asyncio.CancelledError:
+                self._abandon(task)
+                raise
+            if not done:
+                self._abandon(task)
+                raise APITimeoutError(request=None)
+            try:
+                return task.result()
+            except RETRYABLE as e:
+                # full jitter: 0..base*2^n, tidak melewati deadline
+                delay = random.uniform(0, 0.5 * 2 ** attempt)
+                if attempt == self.retries or time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning("LLM request failed (%s), retry in %.2fs", type(e).__name__, delay)
+                await asyncio.sleep(delay)
 
-    def chat(self, messages: list, model: str = "gpt-4o-mini") -> str:
+    @staticmethod
+    def _abandon(task):
+        """
+        Batalkan request yang tidak ditunggu lagi. Kalau ternyata sudah selesai duluan (race
+        dengan cancel / timeout), stream-nya ditutup supaya satu-satunya koneksi di pool kembali.
+        """
+        def close_orphan(t):
+            if not t.cancelled() and t.exception() is None and isinstance(t.result(), AsyncStream):
+                asyncio.ensure_future(t.result().close())
+
+        task.cancel()
+        task.add_done_callback(close_orphan)
+
+    def _cache_lookup(self, messages, model):
+        """Return (cache_key, cached_text). cache_key None = turn ini tidak di-cache."""
+        if self.cache is None or not messages or messages[-1]["role"] != "user":
+            return None, None
+        cache_key = self.cache.key(messages[-1]["content"], model)
+        if cache_key is None:
+            return None, None
+        return cache_key, self.cache.get(cache_key[0])
+
+    def _cache_store(self, cache_key, text):
+        if cache_key is not None and text:
+            self._loop.run_in_executor(None, self.cache.put, *cache_key, text)
+
+    async def achat(self, messages: list, model: str = "gpt-4o-mini", deadline: float = None,
+                    cancelled: threading.Event = None) -> str:
         for m in messages:
             self._add_message(m["role"], m["content"])
 
+        cache_key, cached = self._cache_lookup(messages, model)
+        if cached:
+            self._add_message("assistant", cached)
+            return cached
+
         history = self._get_history()
         if not self.client:
             return "[Dummy Response] (no API key configured)"
 
+        deadline = time.monotonic() + (deadline or self.deadline)
         try:
-            resp = self.client.responses.create(
-                model=model,
-                input=history
-            )
+            resp = await self._with_retry(lambda: self.client.responses.create(model=model, input=history), deadline)
+            if cancelled is not None and cancelled.is_set():
+                raise asyncio.CancelledError  # cancel() datang tepat saat jawaban selesai
             text = getattr(resp, "output_text", "").strip()
             if text:
                 self._add_message("assistant", text)
+                self._cache_store(cache_key, text)
             return text or None
+        except asyncio.CancelledError:
+            self._rollback(messages)
+            raise
         except (APIError, APIConnectionError, RateLimitError) as e:
-            print(f"[Error] OpenAI API error: {e}")
+            logger.error("OpenAI API error: %s", e)
+            return None
+        except Exception as e:
+            logger.exception("Unexpected LLM error: %s", e)
             return None
+
+    async def achat_stream(self, messages: list, model: str = "gpt-4o-mini", deadline: float = None,
+                           cancelled: threading.Event = None):
+        """
+        Async generator delta teks. `deadline` membatasi waktu sampai token pertama (termasuk
+        retry); setelah itu tiap delta harus datang dalam `idle_timeout`. Retry hanya sebelum
+        token pertama (setelah itu teks sudah mungkin diucapkan). Turn yang dibatalkan (task
+        di-cancel atau flag `cancelled` di-set oleh cancel()) tidak disimpan ke history maupun
+        cache, dan pesan user-nya ikut dihapus.
+        """
+        for m in messages:
+            self._add_message(m["role"], m["content"])
+
+        cache_key, cached = self._cache_lookup(messages, model)
+        if cached:
+            self._add_message("assistant", cached)
+            yield cached
+            return
+
+        history = self._get_history()
+        if not self.client:
+            yield "[Dummy Response] (no API key configured)"
+            return
+
+        deadline = time.monotonic() + (deadline or self.deadline)
+        parts = []
+        cacheable = False  # hanya jawaban yang selesai normal yang masuk cache
+        stream = None
+        completed = False
+        aborted = False
+        try:
+            stream = await self._with_retry(
+                lambda: self.client.responses.create(model=model, input=history, stream=True), deadline)
+            events = stream.__aiter__()
+            while True:
+                # time-to-first-token dibatasi deadline; sesudahnya hanya jeda antar delta
+                remaining = deadline - time.monotonic() if not parts else self.idle_timeout
+                if remaining <= 0:
+                    raise APITimeoutError(request=None)
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise APITimeoutError(request=None) from None
+                if cancelled is not None and cancelled.is_set():
+                    raise asyncio.CancelledError  # wait_for bisa menelan cancel yang datang bersamaan
+                if event.type == "response.output_text.delta" and event.delta:
+                    parts.append(event.delta)
+                    yield event.delta
+                elif event.type == "error":
+                    logger.error("OpenAI stream error: %s", getattr(event, "message", event))
+                    break
+                elif event.type == "response.completed":
+                    cacheable = True
+            completed = True
+        except asyncio.CancelledError:
+            aborted = True
+            raise
+        except (APIError, APIConnectionError, RateLimitError) as e:
+            logger.error("OpenAI API error: %s", e)
+            completed = True  # simpan teks parsial yang sudah keluar
         except Exception as e:
-            print(f"[Error] Unexpected LLM error: {e}")
-            return None
\ No newline at end of file
+            logger.exception("Unexpected LLM error: %s", e)
+            completed = True
+        finally:
+            text = "".join(parts).strip()
+            if aborted or (cancelled is not None and cancelled.is_set()):
+                self._rollback(messages)
+            elif completed and text:
+                self._add_message("assistant", text)
+                if cacheable:
+                    self._cache_store(cache_key, text)
+            if stream is not None:
+                # shield: cancel() kedua tidak boleh memotong close, koneksi harus kembali ke pool
+                await asyncio.shield(stream.close())
+
+    async def awarmup(self):
+        """Buka koneksi TLS ke API lebih awal supaya turn pertama tidak bayar handshake."""
+        if self.client:
+            try:
+                await asyncio.wait_for(self.client.models.list(), self.deadline)
+            except Exception as e:
+                logger.warning("LLM warmup failed: %s", e)
+
+    # =====================
+    # Sync facade
+    # =====================
+    def _submit(self, coro, cancelled: threading.Event) -> concurrent.futures.Future:
+        # didaftarkan di bawah lock yang sama dengan cancel(): cancel() yang datang bersamaan
+        # melihat request baru ini, bukan request lama yang sudah selesai
+        with self._inflight_lock:
+            future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+            self._inflight = (future, cancelled)
+        return future
+
+    def cancel(self):
+        """Batalkan request yang sedang berjalan (dipanggil saat user mulai bicara lagi)."""
+        with self._inflight_lock:
+            future, cancelled = self._inflight or (None, None)
+        if future is not None and not future.done():
+            # flag per request: dicek coroutine sebelum menyimpan jawaban, jadi cancel yang
+            # tertelan (mis. oleh wait_for) tetap membuang turn ini
+            cancelled.set()
+            future.cancel()
+            return True
+        return False
+
+    def warmup(self):
+        asyncio.run_coroutine_threadsafe(self.awarmup(), self._loop)
+
+    def chat(self, messages: list, model: str = "gpt-4o-mini", deadline: float = None) -> str:
+        """Blok sampai jawaban lengkap. Return None kalau gagal, timeout, atau dibatalkan."""
+        cancelled = threading.Event()
+        future = self._submit(self.achat(messages, model, deadline, cancelled), cancelled)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            return None
+
+    def chat_stream(self, messages: list, model: str = "gpt-4o-mini", deadline: float = None):
+        """
+        Seperti chat(), tapi yield potongan teks (delta) selama model masih generate.
+        Berhenti lebih awal kalau cancel() dipanggil dari thread lain.
+        """
+        deltas = queue.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        async def pump():
+            try:
+                async for delta in self.achat_stream(messages, model, deadline, cancelled):
+                    deltas.put(delta)
+            finally:
+                deltas.put(done)
+
+        future = self._submit(pump(), cancelled)
+        try:
+            while True:
+                try:
+                    delta = deltas.get(timeout=0.1)
+                except queue.Empty:
+                    if future.cancelled():
+                        return  # task dibatalkan sebelum sempat mulai
+                    continue
+                if delta is done:
+                    return
+                yield delta
+        finally:
+            # consumer berhenti lebih awal (mis. generator ditutup) -> jangan biarkan request jalan terus
+            if not future.done():
+                cancelled.set()
+                future.cancel()
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {}
+
+    def close(self):
+        if self.cache is not None:
+            logger.info("Response cache: %s", self.cache.stats(), extra={"cache": self.cache.stats()})
+            self.cache.close()
+        if self.client:
+            try:
+                asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result(timeout=2.0)
+            except Exception as e:
+                logger.warning("Failed to close HTTP client: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout=2.0)
+        self.history.close()  # tunggu writer SQLite menulis turn yang masih antre
@@ -0,0 +1,85 @@
+import os
+from collections import Counter, defaultdict
+
+from llm.history import estimate_tokens
+from llm.intents import _plural
+
+# ukuran frame kalau snapshot tidak membawa frame_size
+DEFAULT_FRAME_SIZE = (640, 480)
+
+
+class SceneDigest:
+    """
+    Ringkasan scene untuk prompt LLM: objek dikelompokkan per label dengan jumlah, posisi kasar
+    (left / center / right dari pusat box) dan jarak kasar (near / far dari luas box relatif frame).
+    Deteksi di bawah min_confidence dibuang. Hasil di-cache selama isi scene (label + posisi kasar
+    tiap objek) tidak berubah, walaupun YOLO terus publish snapshot baru. Panjangnya dibatasi
+    max_tokens (label yang paling jarang dipotong duluan).
+
+        "2 people (left near, center far); 3 chairs (right far); 1 cup (center near)"
+    """
+
+    def __init__(self, min_confidence: float = 0.4, near_area: float = 0.08, max_tokens: int = 60):
+        self.min_confidence = min_confidence
+        self.near_area = near_area  # box >= 8% luas frame dianggap dekat
+        self.max_tokens = max_tokens
+        self._version = None  # versi snapshot terakhir yang sudah dilihat
+        self._cache = (None, "")  # (isi scene, digest)
+        self.builds = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            min_confidence=float(os.getenv("SCENE_MIN_CONFIDENCE", "0.4")),
+            near_area=float(os.getenv("SCENE_NEAR_AREA", "0.08")),
+            max_tokens=int(os.getenv("SCENE_DIGEST_MAX_TOKENS", "60")),
+        )
+
+    def summarize(self, snapshot) -> str:
+        """Digest untuk snapshot; string kosong kalau tidak ada objek yang cukup yakin."""
+        content, digest = self._cache
+        if snapshot.version == self._version:
+            return digest
+        self._version = snapshot.version
+        places = self._places(snapshot.objects, getattr(snapshot, "frame_size", None) or DEFAULT_FRAME_SIZE)
+        if places == content:
+            return digest
+        digest = self._build(places)
+        self._cache = (places, digest)
+        return digest
+
+    def _where(self, box, width, height):
+        x1, y1, x2, y2 = box
+        cx = (x1 + x2) / 2 / width
+        side = "left" if cx < 1 / 3 else "right" if cx > 2 / 3 else "center"
+        area = max(0, x2 - x1) * max(0, y2 - y1) / float(width * height)
+        return f"{side} {'near' if area >= self.near_area else 'far'}"
+
+    def _places(self, objects, frame_size):
+        """Isi scene yang masuk digest: tuple terurut (label, posisi) -> key cache."""
+        width, height = frame_size
+        return tuple(sorted(
+            (o.label, self._where(o.box, width, height)) for o in objects if o.confidence >= self.min_confidence
+        ))
+
+    def _build(self, places):
+        self.builds += 1
+        groups = defaultdict(Counter)
+        for label, place in places:
+            groups[label][place] += 1
+        if not groups:
+            return ""
+
+        # label terbanyak dulu; posisi per label juga terbanyak dulu
+        parts = []
+        for label, places in sorted(groups.items(), key=lambda kv: (-sum(kv[1].values()), kv[0])):
+            n = sum(places.values())
+            where = ", ".join(place if k == 1 else f"{k} {place}" for place, k in places.most_common())
+            parts.append(f"{n} {_plural(label, n, 'en')} ({where})")
+
+        digest = "; ".join(parts)
+        kept = len(parts)
+        while kept > 1 and estimate_tokens(digest) > self.max_tokens:
+            kept -= 1
+            digest = "; ".join(parts[:kept]) + f"; +{len(parts) - kept} more"
+        return digest
@@ -0,0 +1,51 @@
+import re
+
+# singkatan umum yang titiknya bukan akhir kalimat
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no", "dll", "dsb", "yth", "bpk", "ibu"}
+
+_BOUNDARY = re.compile(r"[.!?…]+[\"')\]]*(?=\s)|[\n]+")
+
+
+class SentenceSegmenter:
+    """
+    Potong stream teks (delta dari LLM) menjadi kalimat utuh secepat mungkin.
+    feed(delta) mengembalikan kalimat yang sudah selesai; flush() mengembalikan sisanya.
+    """
+
+    def __init__(self, min_chars: int = 12, max_chars: int = 220):
+        self.min_chars = min_chars  # kalimat terlalu pendek digabung dengan berikutnya
+        self.max_chars = max_chars  # potong paksa di koma/spasi kalau terlalu panjang
+        self._buf = ""
+
+    def feed(self, delta: str):
+        self._buf += delta
+        out = []
+        start = 0
+        for m in _BOUNDARY.finditer(self._buf):
+            end = m.end()
+            candidate = self._buf[start:end].strip()
+            if not candidate:
+                start = end
+                continue
+            last_word = candidate.rstrip(".!?…\"')]").rsplit(None, 1)[-1].lower() if candidate.rstrip(".!?…\"')]") else ""
+            if m.group().startswith(".") and (last_word in ABBREVIATIONS or last_word.isdigit() and len(last_word) <= 2):
+                continue
+            if len(candidate) < self.min_chars:
+                continue
+            out.append(candidate)
+            start = end
+        self._buf = self._buf[start:]
+
+        # kalimat sangat panjang tanpa titik: potong di koma / spasi terakhir
+        while len(self._buf) > self.max_chars:
+            cut = max(self._buf.rfind(",", 0, self.max_chars), self._buf.rfind(" ", 0, self.max_chars))
+            if cut <= 0:
+                cut = self.max_chars
+            out.append(self._buf[:cut + 1].strip())
+            self._buf = self._buf[cut + 1:]
+        return out
+
+    def flush(self):
+        rest = self._buf.strip()
+        self._buf = ""
+        return [rest] if rest else []
@@ -1,42 +1,59 @@
 import threading
 import platform
+import signal
 import time
 import os
-import traceback
 import logging
 from queue import Queue, Empty
 
+import cv2
+
 from vision.camera import Camera
-from vision.scene import Scene
+from vision.scene import Scene, annotate
+from vision.scheduler import InferenceScheduler
+from vision.remote import RemoteScene
+from vision.state import SceneState
 from audio.stt_vosk import VoskSTT
 from audio.tts import TTS
-from llm.llm_client import LLMClient
-
-logging.basicConfig(level=logging.INFO)
-
-# coba import DifferentialDrive
-try:
-    from control.drive import DifferentialDrive
-    DRIVE_AVAILABLE = True
-except (ImportError, RuntimeError):
-    DRIVE_AVAILABLE = False
-
-# fallback MockDrive
-class MockDrive:
-    def forward(self, speed=0.6):
-        print(f"[MOCK] Forward at {speed}")
-    def backward(self, speed=0.6):
-        print(f"[MOCK] Backward at {speed}")
-    def stop(self):
-        print("[MOCK] Stop")
-    def turn_left(self, speed=0.5, duration=None):
-        print("[MOCK] Turn left")
-    def turn_right(self, speed=0.5, duration=None):
-        print("[MOCK] Turn right")
+from llm.segmenter import SentenceSegmenter
+from llm.scene_digest import SceneDigest
+from utils.governor import Governor
+from utils.logger import setup_logging, get_logger
+from utils.recorder import get_recorder, DumpOnErrorHandler
+from utils.startup import Startup
+from utils.tracing import get_tracer, NULL as NULL_TRACE
+from llm.intents import IntentMatcher, COMMAND_PHRASES, describe_objects, count_reply, presence_reply
+
+logger = get_logger("main")
+
+# DifferentialDrive jatuh ke DummyMotor sendiri kalau gpiozero tidak ada
+from control.drive import DifferentialDrive, MockDrive, GPIO_AVAILABLE as DRIVE_AVAILABLE
+from control.navigation import Navigator
 
 # Config
 DEBUG_VISION = os.getenv("DEBUG_VISION", "0") == "1"
+DEBUG_VISION_PATH = os.getenv("DEBUG_VISION_PATH", "logs/vision_debug.jpg")
 USE_MOCK = os.getenv("MOCK_DRIVE", "1") == "1"
+VISION_MAX_FPS = float(os.getenv("VISION_MAX_FPS", "5"))
+VISION_MOTION_THRESHOLD = float(os.getenv("VISION_MOTION_THRESHOLD", "6"))
+VISION_PROCESS = os.getenv("VISION_PROCESS", "0") == "1"
+NAV_ENABLED = os.getenv("NAV_ENABLED", "0") == "1"
+NAV_MAX_LATENCY = float(os.getenv("NAV_MAX_LATENCY", "0.3"))
+GOVERNOR_ENABLED = os.getenv("GOVERNOR", "1") == "1"
+
+# ringkasan scene untuk prompt LLM, di-cache selama isi scene (label + posisi kasar) tidak berubah
+SCENE_DIGEST = SceneDigest.from_env()
+
+# Acknowledgement perintah: (id, en). Disintesis ke cache TTS saat startup.
+ACK_PHRASES = {
+    "forward": ("Siap, maju", "Okay, moving forward"),
+    "backward": ("Siap, mundur", "Okay, moving back"),
+    "turn_left": ("Belok kiri", "Turning left"),
+    "turn_right": ("Belok kanan", "Turning right"),
+    "stop": ("Berhenti", "Stopped"),
+    "explore": ("Mode jelajah aktif", "Exploring"),
+    "flight_dump": ("Rekaman disimpan", "Saving the recording"),
+}
 
 # =====================
 # Helper: deskripsi scene dan message
@@ -48,165 +65,403 @@ def prepare_user_message(user_text, scene_state):
     scene_keywords = [
         "lihat", "around", "apa",
         "happening", "scene",
-        "lingkungan", "environment"
+        "lingkungan", "environment",
         "see", "saw", "describe"
     ]
 
     if any(word in text.lower() for word in scene_keywords):
-        objects = scene_state.get("objects", [])
-        scene_desc = describe_scene_natural(objects)
+        scene_desc = SCENE_DIGEST.summarize(scene_state.snapshot()) or "nothing in front of me"
         text += f". Scene: {scene_desc}"
 
     return {"role": "user", "content": text}
 
-def describe_scene_natural(objects):
-    desc = []
-    if objects:
-        obj_list = [o.get("label", "object") for o in objects]
-        desc.append(f"i see {', '.join(obj_list)} in front of me")
-    if not desc:
-        return "i see nothing in front of me"
-    return "; ".join(desc)
-
 # =====================
 # Vision worker
 # =====================
 def vision_worker(cam, scene, drive, stop_event, scene_state):
+    tracer = get_tracer()
+    recorder = get_recorder()
+    cam.start()
+    last_seq = -1
+    buf = None  # buffer milik worker, dipakai ulang tiap frame
     while not stop_event.is_set():
         try:
-            ret, frame = next(cam.frames(), (False, None))
-            if not ret or frame is None:
-                time.sleep(0.05)
+            # selalu ambil frame terbaru; frame lama yang menumpuk selama inference dibuang
+            packet = cam.read_latest(after_seq=last_seq, timeout=0.5, out=buf)
+            if packet is None:
+                if not cam.running:
+                    time.sleep(0.5)  # kamera tidak ada
+                continue
+            last_seq = packet.seq
+            buf = packet.frame
+            t_read = time.monotonic()
+            tracer.record("vision.capture", t_read - packet.timestamp)
+            recorder.frame(packet.frame, packet.timestamp, packet.seq)
+
+            frame, objects, age, ran = scene.process(packet.frame, packet.timestamp)
+            if not ran:
                 continue
+            recorder.detections(objects, packet.timestamp, packet.seq)
+            t_infer = time.monotonic()
+            tracer.record("vision.inference", t_infer - t_read)
 
-            frame, objects = scene.detect(frame)
+            if objects and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📦 %s", ", ".join(f"{o.label} ({o.confidence:.2f})" for o in objects))
 
-            if objects:
-                for o in objects:
-                    print(f"📦 {o['label']} (accuracy: {o.get('confidence',0):.2f})")
+            scene_state.publish(objects, packet.seq, packet.timestamp, frame_size=packet.frame.shape[1::-1])
 
-            scene_state["objects"] = objects
+            if DEBUG_VISION:
+                # annotasi hanya dibuat kalau memang mau dilihat
+                cv2.imwrite(DEBUG_VISION_PATH, annotate(frame, objects))
+            tracer.record("vision.postprocess", time.monotonic() - t_infer)
+            tracer.record("vision.frame_to_state", time.monotonic() - packet.timestamp)
 
         except Exception as e:
-            print("[ERROR][vision_worker]:", e)
-            traceback.print_exc()
+            logger.exception("vision_worker failed: %s", e)
             time.sleep(1)
 
 # =====================
 # Voice worker
 # =====================
-def voice_worker(stt, tts_queue, llm, drive, stop_event, scene_state):
-    commands = {
-        ("maju","forward"): lambda lang: (drive.forward(0.6), tts_queue.put(("Siap, maju" if lang=="en" else "Okay, moving forward", lang))),
-        ("stop","berhenti"): lambda lang: (drive.stop(), tts_queue.put(("Berhenti" if lang=="en" else "Stopped", lang)))
-    }
+class TurnGate:
+    """
+    Nomor turn percakapan terbaru. Setiap ucapan user memulai turn baru (barge-in): request LLM
+    yang masih jalan dibatalkan lewat callback, dan kalimat dari turn lama tidak diucapkan.
+    """
+
+    def __init__(self):
+        self.current = 0
+        self._on_new_turn = []
+
+    def subscribe(self, callback):
+        self._on_new_turn.append(callback)
+
+    def next(self):
+        self.current += 1
+        for callback in self._on_new_turn:
+            callback()
+        return self.current
+
+    def stale(self, turn):
+        return turn != self.current
+
+def handle_intent(intent, drive, tts_queue, scene_state, navigator=None, trace=NULL_TRACE, turn=0):
+    """Jalankan intent lokal (tanpa LLM). Return True kalau intent ditangani."""
+    lang = intent.lang
+    if navigator is not None and intent.name in ("stop", "forward", "backward", "turn_left", "turn_right"):
+        navigator.disable()  # perintah manual selalu mengambil alih navigasi otomatis
+
+    if intent.name == "stop":
+        drive.stop()
+    elif intent.name == "explore":
+        if navigator is None:
+            return False
+        navigator.enable()
+    elif intent.name == "flight_dump":
+        if get_recorder().dump("voice") is None:
+            # recorder mati, atau dump sebelumnya masih dalam cooldown
+            reply = "Rekaman belum bisa disimpan" if lang == "id" else "I can't save a recording right now"
+            tts_queue.put((reply, lang, trace, turn))
+            return True
+    elif intent.name in ("forward", "backward", "turn_left", "turn_right"):
+        kwargs = {k: v for k, v in intent.slots.items() if k in ("speed", "duration")}
+        getattr(drive, intent.name)(**kwargs)
+    else:
+        objects = scene_state.snapshot().objects
+        if intent.name == "scene_describe":
+            reply = describe_objects(objects, lang)
+        elif intent.name == "scene_count":
+            reply = count_reply(objects, intent.slots["object"], lang)
+        elif intent.name == "scene_presence":
+            reply = presence_reply(objects, intent.slots["object"], lang)
+        else:
+            return False
+        tts_queue.put((reply, lang, trace, turn))
+        return True
+
+    trace.mark("dispatch")
+    tts_queue.put((ACK_PHRASES[intent.name][lang == "en"], lang, trace, turn))
+    return True
+
+def voice_worker(stt, tts_queue, llm_queue, drive, stop_event, scene_state, turns, navigator=None):
+    """Tetap mendengarkan selama LLM menjawab; jawaban dibuat di llm_worker."""
+    intents = IntentMatcher()
+    tracer = get_tracer()
+    recorder = get_recorder()
+    if recorder.enabled and stt.samplerate == recorder.samplerate:
+        stt.on_audio = recorder.audio
 
     while not stop_event.is_set():
         try:
-            result = stt.listen_once(timeout=3)  # timeout lebih panjang
-            if not result:
+            utt = stt.next_utterance(timeout=3)  # timeout lebih panjang
+            if utt is None or not utt.text:
                 continue
+            text, lang = utt.text, utt.lang
+            turn = turns.next()  # jawaban turn sebelumnya yang belum selesai jadi basi
 
-            # Tangani STT yang return string saja atau tuple
-            if isinstance(result, tuple):
-                text, lang = result
-            else:
-                text = result
-                lang = "en"  # default bahasa
+            # timeline interaksi dihitung dari akhir ucapan user
+            trace = tracer.begin("turn", t0=utt.speech_end or utt.end)
+            trace.mark("stt_final", utt.end)
 
-            if not text:
+            logger.info("Heard (%s): %s", lang, text)
+            recorder.turn("user", text, utt.end)
+
+            # Fast path: perintah robot & pertanyaan scene dijawab lokal
+            intent = intents.match(text)
+            trace.mark("intent")
+            if intent and handle_intent(intent, drive, tts_queue, scene_state, navigator, trace, turn):
+                tts_queue.put((None, lang, trace, turn))  # penanda akhir balasan
                 continue
 
-            print(f"Heard ({lang}): {text}")
-            
-            # Cek perintah robot
-            executed = False
-            for keys, action in commands.items():
-                if any(k.lower() in text.lower() for k in keys):
-                    action(lang)
-                    executed = True
-                    break
-
-            if not executed:
-                # Hanya tambahkan scene jika user menanyakan
-                user_msg = prepare_user_message(text, scene_state)
-                resp = llm.chat([user_msg])
-                if resp:
-                    tts_queue.put((resp, lang))
+            # Hanya tambahkan scene jika user menanyakan
+            llm_queue.put((prepare_user_message(text, scene_state), lang, trace, turn))
 
         except Exception as e:
-            print("[ERROR][voice_worker]:", e)
-            import traceback
-            traceback.print_exc()
-            import time
+            logger.exception("voice_worker failed: %s", e)
             time.sleep(0.1)
 
+def llm_worker(llm, llm_queue, tts_queue, stop_event, turns):
+    turns.subscribe(llm.cancel)  # barge-in: ucapan baru membatalkan request yang sedang jalan
+    while not stop_event.is_set():
+        try:
+            user_msg, lang, trace, turn = llm_queue.get(timeout=0.1)
+        except Empty:
+            continue
+        if turns.stale(turn):
+            continue
+        try:
+            # kirim tiap kalimat ke TTS begitu selesai, tanpa menunggu seluruh jawaban
+            segmenter = SentenceSegmenter()
+            reply = []
+            trace.mark("llm_request")
+            for delta in llm.chat_stream([user_msg]):
+                if turns.stale(turn):
+                    break  # barge-in terjadi sebelum request terdaftar: tutup stream di sini
+                trace.mark("first_token", first=True)
+                reply.append(delta)
+                for sentence in segmenter.feed(delta):
+                    tts_queue.put((sentence, lang, trace, turn))
+            trace.mark("llm_done")
+            get_recorder().turn("assistant", "".join(reply))
+            if not turns.stale(turn):
+                for sentence in segmenter.flush():
+                    tts_queue.put((sentence, lang, trace, turn))
+            tts_queue.put((None, lang, trace, turn))
+        except Exception as e:
+            logger.exception("llm_worker failed: %s", e)
+
 # =====================
-# TTS worker
+# TTS workers
 # =====================
-def tts_worker(tts, tts_queue, stop_event):
+# Dua tahap: sintesis kalimat N+1 berjalan sementara kalimat N sedang diputar.
+# Kalimat dari turn yang sudah basi (user sudah bicara lagi) dibuang di kedua tahap.
+def tts_worker(tts, tts_queue, play_queue, stop_event, turns):
+    tracer = get_tracer()
     while not stop_event.is_set():
         try:
-            text, lang = tts_queue.get(timeout=0.1)
+            text, lang, trace, turn = tts_queue.get(timeout=0.1)
         except Empty:
             continue
         try:
-            if text:
-                tts.say(text, lang)
+            if text is None:
+                play_queue.put((None, trace, turn))  # teruskan penanda akhir ke playback
+            elif text and not turns.stale(turn):
+                trace.mark("tts_start", first=True)
+                with tracer.span("tts.synthesize"):
+                    audio = tts.synthesize(text, lang)
+                trace.mark("tts_first_audio", first=True)
+                play_queue.put((audio, trace, turn))
         except Exception as e:
-            print("[ERROR][tts_worker]:", e)
+            logger.error("tts_worker failed: %s", e)
+
+def playback_worker(tts, play_queue, stop_event, turns):
+    turns.subscribe(tts.interrupt)  # barge-in: kalimat yang sedang diputar juga dihentikan
+    while not stop_event.is_set():
+        try:
+            audio, trace, turn = play_queue.get(timeout=0.1)
+        except Empty:
+            continue
+        try:
+            if audio is None:
+                trace.end()
+                continue
+            if turns.stale(turn):
+                continue
+            trace.mark("playback_start", first=True)
+            tts.play(audio)
+            trace.mark("playback_end")
+        except Exception as e:
+            logger.error("playback_worker failed: %s", e)
+
+# =====================
+# Startup
+# =====================
+def load_scene(startup):
+    if VISION_PROCESS:
+        # YOLO di proses sendiri: GIL proses utama bebas untuk audio realtime
+        width, height = startup.get("camera").resolution()
+        detector = RemoteScene(width=width, height=height)
+    else:
+        detector = Scene()
+    return InferenceScheduler(
+        detector,
+        max_fps=VISION_MAX_FPS,
+        motion_threshold=VISION_MOTION_THRESHOLD,
+    )
+
+def load_tts():
+    tts = TTS()
+    tts.prewarm([(phrase, lang) for pair in ACK_PHRASES.values() for phrase, lang in zip(pair, ("id", "en"))])
+    return tts
+
+def load_llm():
+    from llm.llm_client import LLMClient  # openai SDK baru di-import di thread loader
+
+    llm = LLMClient(system_prompt="You are a witty and friendly robot that loves to joke.")
+    llm.warmup()  # buka koneksi ke API sekarang, bukan saat turn pertama
+    return llm
+
+def governor_worker(startup, stop_event):
+    """Governor memakai subsystem yang berhasil load saja; yang gagal dilewati."""
+    subsystems = {}
+    for name in ("scene", "camera", "stt"):
+        try:
+            subsystems[name] = startup.get(name)
+        except Exception:
+            subsystems[name] = None
+    Governor(scheduler=subsystems["scene"], camera=subsystems["camera"], stt=subsystems["stt"]).run(stop_event)
+
+def close_scene(startup):
+    """RemoteScene punya proses YOLO + shared memory sendiri; tutup eksplisit saat shutdown."""
+    if not startup.ready("scene"):
+        return
+    detector = startup.get("scene").scene
+    if hasattr(detector, "close"):
+        detector.close()
+
+def close_llm(startup):
+    """Batalkan request yang masih jalan, flush history ke SQLite, hentikan event loop LLM."""
+    if not startup.ready("llm"):
+        return
+    llm = startup.get("llm")
+    llm.cancel()
+    llm.close()
+
+def when_ready(startup, names, target):
+    """Tunggu subsystem `names` lalu panggil target(*subsystems). Kalau ada yang gagal, worker tidak jalan."""
+    try:
+        deps = [startup.get(name) for name in names]
+    except Exception as e:
+        logger.warning("%s unavailable, worker disabled: %s", "/".join(names), e)
+        return
+    target(*deps)
 
 # =====================
 # Main
 # =====================
 if __name__ == "__main__":
+    # hanya proses utama: proses spawn (RemoteScene) meng-import ulang modul ini sebagai __mp_main__
+    setup_logging()
     stop_event = threading.Event()
     tts_queue = Queue()
-    scene_state = {"faces": [], "objects": []}
+    play_queue = Queue(maxsize=2)  # cukup untuk overlap, jangan sintesis terlalu jauh di depan
+    llm_queue = Queue()
+    scene_state = SceneState()
+    turns = TurnGate()
+    startup = vision_thread = None
 
     try:
-        cam = Camera()
-        scene = Scene()
+        # black box: dump ring buffer saat ERROR di log atau `kill -USR1 <pid>`
+        recorder = get_recorder()
+        if recorder.enabled:
+            logging.getLogger().addHandler(DumpOnErrorHandler(recorder))
+            if hasattr(signal, "SIGUSR1"):
+                signal.signal(signal.SIGUSR1, lambda signum, frame: recorder.dump("signal"))
+
+        # model-model berat di-load paralel; tiap subsystem online sendiri-sendiri
+        startup = Startup()
+        startup.load("camera", Camera)
+        startup.load("scene", load_scene, startup)
+        startup.load("stt", VoskSTT, model_path="models/vosk-model-small-en-us-0.15",
+                     command_grammar=COMMAND_PHRASES)
+        startup.load("tts", load_tts)
+        startup.load("llm", load_llm)
 
         if DRIVE_AVAILABLE and not USE_MOCK and platform.system() != "Darwin":
             drive = DifferentialDrive(left_pins=(17,18), right_pins=(22,23))
-            print("Using Raspberry Pi DifferentialDrive")
+            logger.info("Using Raspberry Pi DifferentialDrive")
         else:
             drive = MockDrive()
-            print("Using MockDrive")
+            logger.info("Using MockDrive")
 
-        stt = VoskSTT(model_path="models/vosk-model-small-en-us-0.15")
-        tts = TTS()
-        llm = LLMClient(system_prompt="You are a witty and friendly robot that loves to joke.")
+        drive.executor.on_command = recorder.command
+        navigator = Navigator(drive, max_latency=NAV_MAX_LATENCY, tracer=get_tracer())
+        if NAV_ENABLED:
+            navigator.enable()
 
         vision_thread = threading.Thread(
-            target=vision_worker,
-            args=(cam, scene, drive, stop_event, scene_state),
+            target=when_ready,
+            args=(startup, ("camera", "scene"),
+                  lambda cam, scene: vision_worker(cam, scene, drive, stop_event, scene_state)),
             daemon=True
         )
         voice_thread = threading.Thread(
-            target=voice_worker,
-            args=(stt, tts_queue, llm, drive, stop_event, scene_state),
+            target=when_ready,
+            args=(startup, ("stt",),
+                  lambda stt: voice_worker(stt, tts_queue, llm_queue, drive, stop_event, scene_state, turns,
+                                           navigator)),
+            daemon=True
+        )
+        llm_thread = threading.Thread(
+            target=when_ready,
+            args=(startup, ("llm",), lambda llm: llm_worker(llm, llm_queue, tts_queue, stop_event, turns)),
+            daemon=True
+        )
+        nav_thread = threading.Thread(
+            target=when_ready,
+            args=(startup, ("camera",), lambda cam: navigator.run(cam, scene_state, stop_event)),
             daemon=True
         )
         tts_thread = threading.Thread(
-            target=tts_worker,
-            args=(tts, tts_queue, stop_event),
+            target=when_ready,
+            args=(startup, ("tts",), lambda tts: tts_worker(tts, tts_queue, play_queue, stop_event, turns)),
+            daemon=True
+        )
+        playback_thread = threading.Thread(
+            target=when_ready,
+            args=(startup, ("tts",), lambda tts: playback_worker(tts, play_queue, stop_event, turns)),
             daemon=True
         )
 
+        if GOVERNOR_ENABLED:
+            threading.Thread(target=governor_worker, args=(startup, stop_event), daemon=True).start()
+
         vision_thread.start()
         voice_thread.start()
+        llm_thread.start()
+        nav_thread.start()
         tts_thread.start()
+        playback_thread.start()
+
+        startup.wait_all()
+        logger.info("⏱️ Time to ready: %s", startup.report(), extra={"startup": startup.report()})
 
         vision_thread.join()
         voice_thread.join()
         tts_thread.join()
+        playback_thread.join()
 
     except KeyboardInterrupt:
-        print("Shutting down robot...")
+        logger.info("Shutting down robot...")
         stop_event.set()
     except Exception as e:
-        print("[FATAL ERROR]:", e)
-        traceback.print_exc()
-        stop_event.set()
\ No newline at end of file
+        logger.exception("Fatal error: %s", e)
+        stop_event.set()
+    finally:
+        stop_event.set()
+        if vision_thread is not None and vision_thread.is_alive():
+            vision_thread.join(timeout=2.0)  # jangan tutup pipe RemoteScene di tengah detect()
+        if startup is not None:
+            close_scene(startup)
+            close_llm(startup)
+        get_tracer().close()  # flush trace juga saat keluar karena error
@@ -0,0 +1,171 @@
+import logging
+import os
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Level(NamedTuple):
+    name: str
+    fps_scale: float = 1.0  # dikali max_fps awal InferenceScheduler
+    imgsz_scale: float = 1.0  # dikali ukuran input YOLO awal
+    camera: Optional[tuple] = None  # resolusi capture, None = resolusi awal
+    stt_blocksize: Optional[int] = None  # None = blocksize awal
+
+
+# Urutan degradasi: vision dikorbankan dulu supaya latensi percakapan terjaga;
+# blok STT (menambah latensi dengar) baru diperbesar di level terakhir.
+LEVELS = (
+    Level("normal"),
+    Level("warm", fps_scale=0.5),
+    Level("hot", fps_scale=0.5, imgsz_scale=0.75),
+    Level("critical", fps_scale=0.25, imgsz_scale=0.5, camera=(320, 240)),
+    Level("severe", fps_scale=0.2, imgsz_scale=0.5, camera=(320, 240), stt_blocksize=4000),
+)
+
+
+def read_temperature(path) -> Optional[float]:
+    """Suhu CPU dalam °C dari sysfs (millidegree), None kalau tidak tersedia."""
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def read_cpu_times(path="/proc/stat"):
+    """Return {cpuN: (busy, total)} dari /proc/stat (jiffies kumulatif)."""
+    times = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                if not line.startswith("cpu") or line.startswith("cpu "):
+                    continue
+                parts = line.split()
+                values = [int(v) for v in parts[1:]]
+                idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+                times[parts[0]] = (sum(values) - idle, sum(values))
+    except (OSError, ValueError, IndexError):
+        pass
+    return times
+
+
+class Governor:
+    """
+    Governor kualitas berdasarkan suhu CPU, beban per core, dan antrian audio STT. Tiap
+    `interval` detik level dinaikkan/diturunkan paling banyak satu langkah (dengan hysteresis),
+    lalu knob diterapkan: max_fps & imgsz YOLO, resolusi kamera, blocksize STT.
+    Path sysfs/procfs bisa diganti supaya bisa diuji dengan file palsu.
+    """
+
+    def __init__(self, scheduler=None, camera=None, stt=None, thermal_path=None, stat_path="/proc/stat",
+                 interval=None, temps=None, hysteresis=3.0, load_high=0.9, audio_backlog=6, levels=LEVELS):
+        self.scheduler = scheduler
+        self.scene = getattr(scheduler, "scene", None)
+        self.camera = camera
+        self.stt = stt
+        self.thermal_path = thermal_path or os.getenv("GOVERNOR_THERMAL_PATH",
+                                                      "/sys/class/thermal/thermal_zone0/temp")
+        self.stat_path = stat_path
+        self.interval = interval or float(os.getenv("GOVERNOR_INTERVAL", "2"))
+        # suhu minimum untuk masuk level 1..N
+        self.temps = temps or tuple(float(t) for t in os.getenv("GOVERNOR_TEMPS", "65,72,78,82").split(","))
+        self.hysteresis = hysteresis
+        self.load_high = load_high
+        self.audio_backlog = audio_backlog
+        self.levels = levels
+        self.level = 0
+
+        # nilai awal tiap knob, dipulihkan saat kembali ke normal
+        self.base_fps = scheduler.max_fps if scheduler is not None else None
+        self.base_imgsz = getattr(self.scene, "imgsz", None)
+        self.base_resolution = camera.resolution() if camera is not None and camera.cap is not None else None
+        self.base_blocksize = stt.blocksize if stt is not None else None
+
+        self._cpu = read_cpu_times(stat_path)
+        self.last = {}
+
+    # ---------- sampling ----------
+    def sample(self) -> dict:
+        temp = read_temperature(self.thermal_path)
+        cpu = read_cpu_times(self.stat_path)
+        loads = []
+        for core, (busy, total) in cpu.items():
+            prev = self._cpu.get(core)
+            if prev and total > prev[1]:
+                loads.append((busy - prev[0]) / (total - prev[1]))
+        self._cpu = cpu
+        backlog = self.stt.pending() if self.stt is not None else 0
+        self.last = {
+            "temp": temp,
+            "load": round(sum(loads) / len(loads), 2) if loads else 0.0,
+            "load_max": round(max(loads), 2) if loads else 0.0,
+            "audio_backlog": backlog,
+        }
+        return self.last
+
+    def target_level(self, s) -> tuple:
+        """Return (level, alasan) berikutnya; bergerak paling banyak satu langkah."""
+        top = len(self.levels) - 1
+        temp = s["temp"]
+        if temp is not None and self.level < top and temp >= self.temps[min(self.level, len(self.temps) - 1)]:
+            return self.level + 1, f"temp {temp:.1f}°C"
+        if s["audio_backlog"] > self.audio_backlog and self.level < top:
+            return self.level + 1, f"audio backlog {s['audio_backlog']} blocks"
+        if s["load"] >= self.load_high and self.level < top:
+            return self.level + 1, f"cpu load {s['load']:.0%}"
+
+        if self.level > 0:
+            cool = temp is None or temp < self.temps[min(self.level - 1, len(self.temps) - 1)] - self.hysteresis
+            idle = s["load"] < self.load_high - 0.15 and s["audio_backlog"] <= self.audio_backlog // 2
+            if cool and idle:
+                return self.level - 1, "recovered" if temp is None else f"cooled to {temp:.1f}°C"
+        return self.level, None
+
+    # ---------- knobs ----------
+    def apply(self, level: Level) -> dict:
+        applied = {}
+        if self.scheduler is not None and self.base_fps:
+            fps = round(self.base_fps * level.fps_scale, 2)
+            self.scheduler.set_max_fps(fps)
+            applied["max_fps"] = fps
+        if self.base_imgsz and hasattr(self.scene, "set_imgsz"):
+            # kelipatan 32 (stride YOLO), minimal 160
+            imgsz = max(160, int(self.base_imgsz * level.imgsz_scale) // 32 * 32)
+            if self.scene.set_imgsz(imgsz):
+                applied["imgsz"] = imgsz
+        if self.base_resolution is not None:
+            width, height = level.camera or self.base_resolution
+            width, height = min(width, self.base_resolution[0]), min(height, self.base_resolution[1])
+            if self.camera.set_resolution(width, height):
+                applied["camera"] = f"{width}x{height}"
+        if self.base_blocksize:
+            blocksize = level.stt_blocksize or self.base_blocksize
+            if self.stt.set_blocksize(blocksize):
+                applied["stt_blocksize"] = blocksize
+        return applied
+
+    def step(self):
+        s = self.sample()
+        level, reason = self.target_level(s)
+        if level == self.level:
+            return False
+        old = self.levels[self.level].name
+        self.level = level
+        applied = self.apply(self.levels[level])
+        logger.warning("🌡️ Governor %s -> %s (%s; temp=%s load=%.2f max=%.2f backlog=%d): %s",
+                       old, self.levels[level].name, reason, s["temp"], s["load"], s["load_max"],
+                       s["audio_backlog"], applied)
+        return True
+
+    def run(self, stop_event):
+        logger.info("🌡️ Governor started (thermal=%s, levels=%s)", self.thermal_path,
+                    [lvl.name for lvl in self.levels])
+        while not stop_event.wait(self.interval):
+            try:
+                self.step()
+            except Exception as e:
+                logger.error("Governor step failed: %s", e)
+        if self.level:
+            self.level = 0
+            self.apply(self.levels[0])
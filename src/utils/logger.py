@@ -1,26 +1,180 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 
-# Pastikan folder logs ada
+# folder logs/ di root repo
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOG_DIR = os.path.join(BASE_DIR, "..", "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
-
-LOG_FILE = os.path.join(LOG_DIR, "robot.log")
-
-# Konfigurasi logging global
-logging.basicConfig(
-    level=logging.DEBUG,  # simpan semua level ke file
-    format="[%(asctime)s] [%(levelname)s] %(name)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        logging.StreamHandler(),               # tampilkan ke console
-        logging.FileHandler(LOG_FILE, "a")     # simpan ke logs/robot.log
-    ]
-)
-
-# Ambil logger utama
+LOG_FILE = os.path.join(LOG_DIR, "robot.jsonl")
+
+# atribut bawaan LogRecord; sisanya (dari extra=...) ikut ditulis sebagai field JSON.
+# `exc` = traceback yang sudah diformat oleh _DropQueueHandler.prepare()
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed", "exc"}
+
 logger = logging.getLogger("robot")
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu record = satu baris JSON (ts, level, logger, thread, msg, + field extra)."""
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                data[key] = value
+        if getattr(record, "suppressed", 0):
+            data["suppressed"] = record.suppressed
+        if getattr(record, "exc", None):
+            data["exc"] = record.exc
+        elif record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=repr)
+
+
+class ConsoleFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("[%(asctime)s] [%(levelname)s] %(name)s - %(message)s", datefmt="%H:%M:%S")
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, "suppressed", 0):
+            text += f" (+{record.suppressed} similar suppressed)"
+        if getattr(record, "exc", None):
+            text += "\n" + record.exc
+        return text
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Dedup pesan berulang dari hot loop: per (logger, level, template pesan) hanya `burst`
+    record per `window` detik yang lolos. Jumlah yang dibuang dilaporkan di record berikutnya
+    yang lolos (atribut `suppressed`). Dipanggil di thread pemanggil, jadi harus murah.
+    """
+
+    def __init__(self, burst=5, window=10.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._buckets = {}  # key -> [window_start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or now - bucket[0] >= self.window:
+                suppressed = bucket[2] if bucket else 0
+                self._buckets[key] = [now, 1, 0]
+                if len(self._buckets) > 4096:
+                    self._buckets.clear()  # batasi memori kalau template-nya dinamis
+            elif bucket[1] < self.burst:
+                bucket[1] += 1
+                suppressed = 0
+            else:
+                bucket[2] += 1
+                return False
+        record.suppressed = suppressed
+        return True
+
+
+class _DropQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler yang membuang record kalau antrian penuh, tidak pernah blok pemanggil."""
+
+    dropped = 0
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # seperti QueueHandler.prepare() (pesan diformat di thread pemanggil, exc_info tidak
+        # ikut antri), tapi traceback disimpan di record.exc, bukan digabung ke msg
+        exc = self._exc_formatter.formatException(record.exc_info) if record.exc_info else record.exc_text
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        record.exc = exc
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DropQueueHandler.dropped += 1
+
+
+def setup_logging(level=None, path=LOG_FILE, console=True, max_bytes=None, backups=None,
+                  burst=None, window=None, queue_size=10000):
+    """
+    Pasang pipeline logging non-blocking di root logger: semua modul cukup pakai
+    logging.getLogger(__name__). Record masuk antrian (QueueHandler) dan ditulis oleh satu
+    thread QueueListener ke file JSON-lines yang dirotasi per ukuran (+ console).
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    if path and os.getenv("LOG_FILE"):
+        path = os.getenv("LOG_FILE")
+    max_bytes = max_bytes or int(float(os.getenv("LOG_MAX_MB", "5")) * 1024 * 1024)
+    backups = backups if backups is not None else int(os.getenv("LOG_BACKUPS", "3"))
+    burst = burst if burst is not None else int(os.getenv("LOG_RATE_BURST", "5"))
+    window = window or float(os.getenv("LOG_RATE_WINDOW", "10"))
+    console = console and os.getenv("LOG_CONSOLE", "1") == "1"
+
+    handlers = []
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                            encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(ConsoleFormatter())
+        handlers.append(stream_handler)
+
+    q = queue.Queue(maxsize=queue_size)
+    queue_handler = _DropQueueHandler(q)
+    queue_handler.addFilter(RateLimitFilter(burst=burst, window=window))
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush antrian ke file (dipanggil otomatis saat exit)."""
+    global _listener
+    if _listener is not None:
+        if _DropQueueHandler.dropped:
+            logger.warning("Dropped %d log records (queue full)", _DropQueueHandler.dropped)
+        _listener.stop()
+        _listener = None
+
 
 def get_logger(name: str = None):
     """Ambil child logger. Jika name None, return logger utama."""
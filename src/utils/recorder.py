@@ -0,0 +1,319 @@
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# satu baris deteksi: x1, y1, x2, y2, score, class (sama dengan vision.remote)
+_DET_ROW = 6
+
+_COMMAND_DTYPE = np.dtype([("ts", "f8"), ("left", "f4"), ("right", "f4"), ("duration", "f4"), ("name", "U16")])
+_TURN_DTYPE = np.dtype([("ts", "f8"), ("role", "U9"), ("text", "U400")])
+
+
+class _Ring:
+    """Index ring untuk array yang sudah dialokasi: slot() -> posisi tulis berikutnya."""
+
+    __slots__ = ("size", "count", "lock")
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def slot(self):
+        idx = self.count % self.size
+        self.count += 1
+        return idx
+
+    def spans(self):
+        """Rentang slot (start, stop) urut lama -> baru, paling banyak dua (dipanggil dengan lock dipegang)."""
+        if self.count <= self.size:
+            return [(0, self.count)]
+        start = self.count % self.size
+        return [(start, self.size), (0, start)] if start else [(0, self.size)]
+
+
+def _ordered(arr, spans):
+    """Isi ring urut lama -> baru sebagai view (tanpa copy)."""
+    return [arr[a:b] for a, b in spans]
+
+
+def _write_npy(zf, name, parts):
+    """
+    Tulis potongan array (urut) sebagai satu member .npy di npz, langsung dari view ring
+    tanpa digabung dulu di memori. Hasilnya bisa dibaca np.load() seperti output np.savez.
+    """
+    with zf.open(name + ".npy", "w", force_zip64=True) as f:
+        if len(parts) == 1:
+            np.lib.format.write_array(f, parts[0], allow_pickle=False)
+            return
+        shape = (sum(len(p) for p in parts),) + parts[0].shape[1:]
+        np.lib.format.write_array_header_1_0(
+            f, {"descr": np.lib.format.dtype_to_descr(parts[0].dtype), "fortran_order": False, "shape": shape})
+        for p in parts:
+            if p.size:
+                f.write(p.reshape(-1).view(np.uint8))
+
+
+class FlightRecorder:
+    """
+    Black box di memori: ring buffer berukuran tetap (dialokasi sekali di awal) untuk frame kecil,
+    deteksi, PCM mikrofon, command motor, dan turn percakapan, semua dengan timestamp
+    time.monotonic(). Tidak ada I/O di jalur record; dump() menulis snapshot .npz di thread
+    background (saat error, sinyal, atau perintah suara). Total memori (semua array) dibatasi
+    max_bytes: jumlah frame dikurangi dulu, lalu ring deteksi & PCM; kalau tetap tidak muat,
+    recorder dimatikan. Saat dump, ring frame (bagian terbesar) ditulis langsung ke file tanpa
+    copy; ring lain di-copy dulu, jadi memori puncak kira-kira max_bytes + ring non-frame.
+    """
+
+    def __init__(self, enabled=True, out_dir="logs/flight", max_bytes=64 * 1024 * 1024, frame_size=(160, 120),
+                 frames=120, frame_fps=4.0, detections=256, max_objects=32, audio_seconds=30.0,
+                 samplerate=16000, commands=512, turns=64, cooldown=30.0):
+        self.enabled = enabled
+        self.out_dir = out_dir
+        self.frame_size = frame_size
+        self.frame_interval = 1.0 / frame_fps if frame_fps > 0 else 0.0
+        self.samplerate = samplerate
+        self.cooldown = cooldown
+        self.dumps = 0
+        self.nbytes = 0
+        self._last_frame = 0.0
+        self._last_dump = 0.0
+        self._dumping = threading.Lock()
+        if not enabled:
+            return
+
+        w, h = frame_size
+        n_pcm = int(audio_seconds * samplerate)
+        frame_bytes = w * h * 3 + 16  # + ts & seq
+        det_bytes = max_objects * _DET_ROW * 4 + 20  # + count, ts & seq
+        small = 1024 * 16 + commands * _COMMAND_DTYPE.itemsize + turns * _TURN_DTYPE.itemsize
+        fixed = small + detections * det_bytes + n_pcm * 2
+        if fixed + frames * frame_bytes > max_bytes:
+            # frame paling besar dan paling gampang dikorbankan duluan
+            frames = max(0, (max_bytes - fixed) // frame_bytes)
+            if frames == 0:
+                # masih lebih dari batas: kecilkan ring deteksi & PCM secara proporsional
+                scale = min(1.0, (max_bytes - small) / float(detections * det_bytes + n_pcm * 2))
+                detections, n_pcm = int(detections * scale), int(n_pcm * scale)
+            if detections < 1 or n_pcm < samplerate:
+                logger.warning("Flight recorder disabled: RECORDER_MAX_MB=%.1f too small", max_bytes / 2 ** 20)
+                self.enabled = False
+                return
+            logger.warning("Flight recorder capped at %d frames, %d detections, %.0fs audio to stay under %.1f MB",
+                           frames, detections, n_pcm / samplerate, max_bytes / 2 ** 20)
+
+        self._frames = np.zeros((frames, h, w, 3), dtype=np.uint8)
+        self._frame_ts = np.zeros(frames, dtype=np.float64)
+        self._frame_seq = np.zeros(frames, dtype=np.int64)
+        self._frame_ring = _Ring(frames) if frames else None
+
+        self._dets = np.zeros((detections, max_objects, _DET_ROW), dtype=np.float32)
+        self._det_n = np.zeros(detections, dtype=np.int32)
+        self._det_ts = np.zeros(detections, dtype=np.float64)
+        self._det_seq = np.zeros(detections, dtype=np.int64)
+        self._det_ring = _Ring(detections)
+
+        # PCM kontinu + timestamp per blok (posisi sampel absolut) untuk rekonstruksi waktu
+        self._pcm = np.zeros(n_pcm, dtype=np.int16)
+        self._pcm_pos = 0
+        self._pcm_blocks = np.zeros((1024, 2), dtype=np.float64)  # (ts, sample index)
+        self._pcm_block_ring = _Ring(len(self._pcm_blocks))
+        self._pcm_lock = threading.Lock()
+
+        self._commands = np.zeros(commands, dtype=_COMMAND_DTYPE)
+        self._command_ring = _Ring(commands)
+        self._turns = np.zeros(turns, dtype=_TURN_DTYPE)
+        self._turn_ring = _Ring(turns)
+
+        self.nbytes = sum(a.nbytes for a in vars(self).values() if isinstance(a, np.ndarray))
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.getenv("RECORDER", "1") == "1",
+            out_dir=os.getenv("RECORDER_DIR", "logs/flight"),
+            max_bytes=int(float(os.getenv("RECORDER_MAX_MB", "64")) * 1024 * 1024),
+            frame_fps=float(os.getenv("RECORDER_FRAME_FPS", "4")),
+            audio_seconds=float(os.getenv("RECORDER_AUDIO_SECONDS", "30")),
+        )
+
+    # =====================
+    # Record (hot path: tanpa alokasi besar, tanpa I/O)
+    # =====================
+    def frame(self, frame, ts, seq=-1):
+        """Simpan frame kecil, paling banyak frame_fps kali per detik."""
+        if not self.enabled or self._frame_ring is None or ts - self._last_frame < self.frame_interval:
+            return
+        ring = self._frame_ring
+        if not ring.lock.acquire(blocking=False):
+            return  # dump sedang menulis ring frame ke file: sampel ini dilewati, jangan blok vision
+        try:
+            self._last_frame = ts
+            idx = ring.slot()
+            cv2.resize(frame, self.frame_size, dst=self._frames[idx], interpolation=cv2.INTER_AREA)
+            self._frame_ts[idx] = ts
+            self._frame_seq[idx] = seq
+        finally:
+            ring.lock.release()
+
+    def detections(self, detections, ts, seq=-1):
+        if not self.enabled:
+            return
+        n = min(len(detections), self._dets.shape[1])
+        ring = self._det_ring
+        with ring.lock:
+            idx = ring.slot()
+            if n:
+                row = self._dets[idx]
+                row[:n, :4] = detections.boxes[:n]
+                row[:n, 4] = detections.scores[:n]
+                row[:n, 5] = detections.classes[:n]
+            self._det_n[idx] = n
+            self._det_ts[idx] = ts
+            self._det_seq[idx] = seq
+
+    def audio(self, data, ts=None):
+        """Blok PCM int16 mono (bytes) dari mikrofon."""
+        if not self.enabled:
+            return
+        pcm = np.frombuffer(data, dtype=np.int16)
+        size = len(self._pcm)
+        with self._pcm_lock:
+            if len(pcm) >= size:
+                pcm = pcm[-size:]
+            start = self._pcm_pos % size
+            first = min(len(pcm), size - start)
+            self._pcm[start:start + first] = pcm[:first]
+            self._pcm[:len(pcm) - first] = pcm[first:]
+            idx = self._pcm_block_ring.slot()
+            self._pcm_blocks[idx] = (time.monotonic() if ts is None else ts, self._pcm_pos)
+            self._pcm_pos += len(pcm)
+
+    def command(self, cmd, ts=None):
+        """MotionCommand yang mulai dijalankan executor."""
+        if not self.enabled:
+            return
+        ring = self._command_ring
+        with ring.lock:
+            self._commands[ring.slot()] = (time.monotonic() if ts is None else ts, cmd.left, cmd.right,
+                                           cmd.duration if cmd.duration is not None else -1.0, cmd.name[:16])
+
+    def turn(self, role, text, ts=None):
+        """Satu giliran percakapan (user / assistant), teks dipotong 400 karakter."""
+        if not self.enabled or not text:
+            return
+        ring = self._turn_ring
+        with ring.lock:
+            self._turns[ring.slot()] = (time.monotonic() if ts is None else ts, role[:9], text[:400])
+
+    # =====================
+    # Dump
+    # =====================
+    def snapshot(self) -> dict:
+        """
+        Copy ring kecil (deteksi, PCM, command, turn) urut lama -> baru; lock tiap ring hanya
+        dipegang selama copy. Ring frame tidak ikut: dump() menulisnya langsung dari ring.
+        """
+        data = {}
+        with self._det_ring.lock:
+            spans = self._det_ring.spans()
+            data["det"] = np.concatenate(_ordered(self._dets, spans))
+            data["det_n"] = np.concatenate(_ordered(self._det_n, spans))
+            data["det_ts"] = np.concatenate(_ordered(self._det_ts, spans))
+            data["det_seq"] = np.concatenate(_ordered(self._det_seq, spans))
+        with self._pcm_lock:
+            size = len(self._pcm)
+            n = min(self._pcm_pos, size)
+            start = self._pcm_pos % size if self._pcm_pos > size else 0
+            data["pcm"] = np.concatenate((self._pcm[start:n], self._pcm[:start]))
+            data["pcm_start"] = np.int64(self._pcm_pos - n)  # index sampel absolut pcm[0]
+            blocks = np.concatenate(_ordered(self._pcm_blocks, self._pcm_block_ring.spans()))
+            data["pcm_blocks"] = blocks[blocks[:, 1] >= self._pcm_pos - n]
+        with self._command_ring.lock:
+            data["commands"] = np.concatenate(_ordered(self._commands, self._command_ring.spans()))
+        with self._turn_ring.lock:
+            data["turns"] = np.concatenate(_ordered(self._turns, self._turn_ring.spans()))
+        return data
+
+    def dump(self, reason="manual", background=True):
+        """
+        Tulis snapshot ke out_dir/flight-<waktu>-<reason>.npz. Paling banyak satu dump berjalan,
+        dan dump berikutnya ditolak selama cooldown. Return path (atau None kalau dilewati).
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        if now - self._last_dump < self.cooldown or not self._dumping.acquire(blocking=False):
+            return None
+        self._last_dump = now
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.out_dir, f"flight-{stamp}-{reason}.npz")
+
+        def run():
+            try:
+                meta = {
+                    "reason": reason,
+                    "wall_time": time.time(),
+                    "monotonic": time.monotonic(),  # wall = ts + (wall_time - monotonic)
+                    "samplerate": self.samplerate,
+                    "frame_size": self.frame_size,
+                    "det_columns": ["x1", "y1", "x2", "y2", "score", "class"],
+                }
+                os.makedirs(self.out_dir, exist_ok=True)
+                tmp = path + ".tmp.npz"
+                # format sama dengan np.savez (zip tanpa kompresi), tapi ditulis per array
+                with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+                    _write_npy(zf, "meta", [np.array(json.dumps(meta))])
+                    if self._frame_ring is not None:
+                        # langsung dari ring dengan lock dipegang: frame() melewatkan sampel selama itu
+                        with self._frame_ring.lock:
+                            spans = self._frame_ring.spans()
+                            for name, arr in (("frames", self._frames), ("frame_ts", self._frame_ts),
+                                              ("frame_seq", self._frame_seq)):
+                                _write_npy(zf, name, _ordered(arr, spans))
+                    for name, arr in self.snapshot().items():
+                        _write_npy(zf, name, [arr])
+                os.replace(tmp, path)
+                self.dumps += 1
+                logger.warning("🛩️ Flight recorder dumped to %s (%s)", path, reason)
+            except Exception as e:
+                logger.error("Flight recorder dump failed: %s", e)
+            finally:
+                self._dumping.release()
+
+        if background:
+            threading.Thread(target=run, name="flight-dump", daemon=True).start()
+        else:
+            run()
+        return path
+
+
+class DumpOnErrorHandler(logging.Handler):
+    """Handler logging: record ERROR ke atas memicu dump (cooldown di FlightRecorder.dump)."""
+
+    def __init__(self, recorder, level=logging.ERROR):
+        super().__init__(level)
+        self.recorder = recorder
+
+    def emit(self, record):
+        if record.name != __name__:  # kegagalan dump sendiri tidak memicu dump lagi
+            self.recorder.dump("error")
+
+
+_recorder = None
+
+
+def get_recorder() -> FlightRecorder:
+    """Recorder global, dikonfigurasi dari env RECORDER / RECORDER_DIR / RECORDER_MAX_MB / ..."""
+    global _recorder
+    if _recorder is None:
+        _recorder = FlightRecorder.from_env()
+    return _recorder
@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+
+class Startup:
+    """
+    Load subsystem (kamera, YOLO, Vosk, TTS, LLM) paralel di thread masing-masing.
+    Worker menunggu hanya subsystem yang dia butuhkan lewat get(), jadi perintah suara
+    sudah jalan walaupun YOLO masih loading. Time-to-ready tiap subsystem di-log dan
+    direkam ke tracer sebagai startup.<name>.
+    """
+
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.times = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, factory, *args, **kwargs):
+        """Jalankan factory(*args, **kwargs) di background; hasilnya diambil dengan get(name)."""
+        future = Future()
+        with self._lock:
+            self._futures[name] = future
+
+        def run():
+            try:
+                result = factory(*args, **kwargs)
+            except BaseException as e:
+                self._done(name, ok=False, error=e)
+                future.set_exception(e)
+                return
+            self._done(name, ok=True)
+            future.set_result(result)
+
+        threading.Thread(target=run, name=f"load-{name}", daemon=True).start()
+        return future
+
+    def _done(self, name, ok, error=None):
+        elapsed = time.monotonic() - self.t0
+        self.times[name] = elapsed
+        get_tracer().record(f"startup.{name}", elapsed)
+        if ok:
+            logger.info("✅ %s ready in %.2fs", name, elapsed, extra={"subsystem": name, "ready_s": round(elapsed, 3)})
+        else:
+            logger.error("%s failed after %.2fs: %s", name, elapsed, error)
+
+    def get(self, name, timeout=None):
+        """Tunggu subsystem siap. Raise exception dari factory kalau load gagal."""
+        return self._futures[name].result(timeout)
+
+    def ready(self, name) -> bool:
+        future = self._futures.get(name)
+        return future is not None and future.done() and future.exception() is None
+
+    def wait_all(self, timeout=None):
+        for future in list(self._futures.values()):
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+    def report(self) -> dict:
+        return {name: round(t, 2) for name, t in sorted(self.times.items(), key=lambda kv: kv[1])}
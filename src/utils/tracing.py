@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class RollingHistogram:
+    """Simpan N sampel terakhir; persentil dihitung hanya saat dump."""
+
+    __slots__ = ("samples", "count")
+
+    def __init__(self, size=1024):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def summary(self):
+        data = sorted(self.samples)
+        if not data:
+            return {"count": self.count}
+
+        def pct(q):
+            return round(data[min(len(data) - 1, int(q * len(data)))] * 1000.0, 2)
+
+        return {"count": self.count, "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+                "max_ms": round(data[-1] * 1000.0, 2)}
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, time.monotonic() - self.start)
+        return False
+
+
+class Trace:
+    """Timeline satu interaksi: mark(event) menyimpan timestamp, end() merekam delta ke histogram."""
+
+    __slots__ = ("tracer", "kind", "marks", "_done")
+
+    def __init__(self, tracer, kind, t0=None):
+        self.tracer = tracer
+        self.kind = kind
+        self.marks = {}
+        self._done = False
+        self.mark("start", t0)
+
+    def mark(self, event, t=None, first=False):
+        """first=True: simpan hanya kemunculan pertama (mis. first_token, playback_start)."""
+        if first and event in self.marks:
+            return
+        self.marks[event] = time.monotonic() if t is None else t
+
+    def end(self):
+        if self._done:
+            return
+        self._done = True
+        t0 = self.marks["start"]
+        for event, t in self.marks.items():
+            if event != "start":
+                self.tracer.record(f"{self.kind}.{event}", t - t0)
+        self.tracer.record(f"{self.kind}.total", max(self.marks.values()) - t0)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mark(self, event, t=None, first=False):
+        pass
+
+    def end(self):
+        pass
+
+
+NULL = _NullSpan()
+
+
+class Tracer:
+    """
+    Tracing ringan untuk latensi per interaksi dan per frame. Kalau disabled, span()/begin()
+    mengembalikan objek no-op yang sama sehingga overhead hampir nol.
+    """
+
+    def __init__(self, enabled=False, path=None, interval=30.0, port=None, hist_size=1024):
+        self.enabled = enabled
+        self.path = path
+        self.interval = interval
+        self.hist_size = hist_size
+        self._hists = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if not enabled:
+            return
+        if path:
+            threading.Thread(target=self._dump_loop, name="trace-dump", daemon=True).start()
+        if port:
+            self._serve(port)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.getenv("TRACE", "0") == "1",
+            path=os.getenv("TRACE_FILE", "logs/metrics.json"),
+            interval=float(os.getenv("TRACE_INTERVAL", "30")),
+            port=int(os.getenv("TRACE_PORT", "0")) or None,
+        )
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        hist = self._hists.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._hists.setdefault(name, RollingHistogram(self.hist_size))
+        hist.add(seconds)
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else NULL
+
+    def begin(self, kind, t0=None):
+        return Trace(self, kind, t0) if self.enabled else NULL
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self._hists.items())
+        return {name: hist.summary() for name, hist in sorted(items)}
+
+    def dump(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"time": time.time(), "metrics": self.snapshot()}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def _dump_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                logger.warning("Failed to write metrics: %s", e)
+
+    def _serve(self, port):
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(tracer.snapshot(), indent=1).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, name="trace-http", daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        if self.enabled:
+            self.dump()
+
+
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """Tracer global, dikonfigurasi dari env TRACE / TRACE_FILE / TRACE_INTERVAL / TRACE_PORT."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer.from_env()
+    return _tracer
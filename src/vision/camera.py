@@ -1,31 +1,78 @@
-from typing import Iterator, Tuple, Optional
+from typing import Iterator, NamedTuple, Tuple, Optional, Union
 import cv2
 import logging
 import platform
+import os
+import threading
+import time
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# index kamera terakhir yang berhasil dibuka, dicoba duluan sebelum scan
+INDEX_CACHE = os.getenv("CAMERA_INDEX_CACHE", "cache/camera_index")
+
+
+class FramePacket(NamedTuple):
+    frame: np.ndarray
+    timestamp: float  # time.monotonic() saat frame di-grab
+    seq: int
+    dropped: int = 0  # frame yang terlewat oleh pembaca ini sejak after_seq
+
 
 class Camera:
-    def __init__(self, device_index: Optional[int] = None, width: int = 640, height: int = 480):
+    def __init__(self, device_index: Optional[Union[int, str]] = None, width: int = 640, height: int = 480,
+                 ring_size: int = 3, realtime: bool = True):
         self.width = width
         self.height = height
         self.cap = None
 
+        # state untuk background capture (lihat start())
+        self.ring_size = max(2, ring_size)
+        self._ring = []
+        self._ring_ts = [0.0] * self.ring_size
+        self._latest_idx = -1
+        self._seq = -1
+        self._cond = threading.Condition()
+        self._running = threading.Event()
+        self._thread = None
+        self._pending_resolution = None  # diterapkan grabber thread (VideoCapture tidak thread-safe)
+
         # cek OS
         self.is_windows = platform.system() == "Windows"
 
+        # device_index berupa path = replay file video (benchmark / debugging)
+        self.is_file = isinstance(device_index, str)
+        self._frame_interval = 0.0
+        if self.is_file:
+            self.cap = self._open_camera(device_index)
+            if self.cap is None:
+                logger.warning("⚠️ Cannot open video file %s", device_index)
+                return
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            self._frame_interval = 1.0 / fps if realtime else 0.0
+            return
+
         # coba device index manual dulu
         if device_index is not None:
             self.cap = self._open_camera(device_index)
 
+        # lalu index terakhir yang berhasil (scan 6 index bisa makan beberapa detik di Pi)
+        cached = self._cached_index()
+        if (self.cap is None or not self.cap.isOpened()) and cached is not None and cached != device_index:
+            self.cap = self._open_camera(cached)
+
         # jika gagal atau device_index None, coba scan 0-5
         if self.cap is None or not self.cap.isOpened():
             logger.info("🔍 Scanning available cameras...")
             for i in range(6):
+                if i == cached:
+                    continue
                 self.cap = self._open_camera(i)
                 if self.cap is not None and self.cap.isOpened():
                     logger.info("✅ Camera found at index %s", i)
+                    self._save_index(i)
                     break
 
         if self.cap is None or not self.cap.isOpened():
@@ -37,9 +84,26 @@ class Camera:
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
 
-    def _open_camera(self, index: int):
+    @staticmethod
+    def _cached_index() -> Optional[int]:
+        try:
+            with open(INDEX_CACHE) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_index(index: int):
+        try:
+            os.makedirs(os.path.dirname(INDEX_CACHE) or ".", exist_ok=True)
+            with open(INDEX_CACHE, "w") as f:
+                f.write(str(index))
+        except OSError as e:
+            logger.warning("Failed to cache camera index: %s", e)
+
+    def _open_camera(self, index: Union[int, str]):
         try:
-            if self.is_windows:
+            if self.is_windows and not isinstance(index, str):
                 cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
             else:
                 cap = cv2.VideoCapture(index)
@@ -66,7 +130,133 @@ class Camera:
 
                 yield ret, frame
 
+    # =====================
+    # Background capture
+    # =====================
+    def start(self):
+        """Jalankan grabber thread yang selalu menyimpan frame terbaru ke ring buffer."""
+        if self.cap is None or self._thread is not None:
+            return self
+        self._alloc_ring()
+        self._running.set()
+        self._thread = threading.Thread(target=self._grab_loop, name="camera-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        with self._cond:
+            self._cond.notify_all()
+
+    def resolution(self) -> Tuple[int, int]:
+        """Resolusi (width, height) yang benar-benar dipakai driver."""
+        if self.cap is None:
+            return self.width, self.height
+        w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or self.width
+        h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or self.height
+        return w, h
+
+    def set_resolution(self, width: int, height: int) -> bool:
+        """Ganti resolusi capture saat runtime. Return False untuk file video / tanpa kamera."""
+        if self.cap is None or self.is_file:
+            return False
+        self.width, self.height = width, height
+        if self._thread is None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        else:
+            self._pending_resolution = (width, height)
+        return True
+
+    def _alloc_ring(self):
+        w, h = self.resolution()
+        self._ring = [np.empty((h, w, 3), dtype=np.uint8) for _ in range(self.ring_size)]
+
+    def _grab_loop(self):
+        next_frame = time.monotonic()
+        while self._running.is_set():
+            if self.cap is None or not self.cap.isOpened():
+                logger.error("❌ Camera unexpectedly closed")
+                break
+
+            if self._pending_resolution is not None:
+                # slot ring dialokasi ulang otomatis oleh retrieve() begitu ukuran frame berubah
+                width, height = self._pending_resolution
+                self._pending_resolution = None
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+            if self._frame_interval:
+                # file video diputar sesuai fps aslinya, seperti kamera sungguhan
+                next_frame += self._frame_interval
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            if not self.cap.grab():
+                if self.is_file:
+                    logger.info("📼 End of video file")
+                    break
+                logger.warning("⚠️ Empty frame from camera")
+                time.sleep(0.01)
+                continue
+            ts = time.monotonic()
+
+            # tulis ke slot setelah latest; read_latest() meng-copy slot latest di bawah lock
+            idx = (self._latest_idx + 1) % self.ring_size
+            buf = self._ring[idx]
+            ret, frame = self.cap.retrieve(buf)
+            if not ret or frame is None:
+                continue
+            if frame is not buf:
+                # resolusi berubah dari driver -> alokasi ulang slot sekali saja
+                self._ring[idx] = frame
+
+            with self._cond:
+                self._seq += 1
+                self._ring_ts[idx] = ts
+                self._latest_idx = idx
+                self._cond.notify_all()
+
+        self._running.clear()
+        with self._cond:
+            self._cond.notify_all()
+
+    def read_latest(self, after_seq: int = -1, timeout: float = 1.0,
+                    out: Optional[np.ndarray] = None) -> Optional[FramePacket]:
+        """
+        Ambil frame terbaru dengan seq > after_seq. Return None jika timeout / kamera tidak ada.
+        Frame selalu di-copy ke memori milik pemanggil: ke `out` kalau shape-nya sama, kalau
+        tidak ke array baru (pakai lagi sebagai `out` berikutnya). Tiap pembaca melacak posisinya
+        sendiri lewat after_seq; FramePacket.dropped = frame yang dia lewatkan.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._seq <= after_seq or self._latest_idx < 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running.is_set():
+                    return None
+                self._cond.wait(remaining)
+
+            idx = self._latest_idx
+            src = self._ring[idx]
+            if out is not None and out.shape == src.shape:
+                np.copyto(out, src)
+                frame = out
+            else:
+                frame = src.copy()  # pertama kali / resolusi berubah
+            dropped = self._seq - after_seq - 1 if after_seq >= 0 else 0
+            return FramePacket(frame, self._ring_ts[idx], self._seq, dropped)
+
+    @property
+    def running(self) -> bool:
+        return self._running.is_set()
+
     def release(self):
+        self.stop()
         if self.cap and self.cap.isOpened():
             self.cap.release()
             logger.info("📷 Camera released")
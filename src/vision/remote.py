@@ -0,0 +1,186 @@
+import logging
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from vision.scene import Detections
+
+logger = logging.getLogger(__name__)
+
+# satu baris hasil: x1, y1, x2, y2, score, class
+_ROW = 6
+
+
+def _pack(boxes, scores, classes):
+    out = np.empty((len(scores), _ROW), dtype=np.float32)
+    out[:, :4] = boxes
+    out[:, 4] = scores
+    out[:, 5] = classes
+    return out.tobytes()
+
+
+def _unpack(data, names):
+    arr = np.frombuffer(data, dtype=np.float32).reshape(-1, _ROW)
+    return Detections(arr[:, :4], arr[:, 4], arr[:, 5].astype(np.int32), names)
+
+
+def _worker_main(conn, shm_name, slots, shape, scene_kwargs, cpus, niceness):
+    """Entry point proses inference: load Scene, lalu layani request (seq, slot, h, w)."""
+    from utils.logger import setup_logging, shutdown_logging
+
+    # file log hanya ditulis proses utama; handler yang mungkin terpasang saat import dibuang dulu
+    shutdown_logging()
+    setup_logging(path=None)
+    try:
+        if cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        if niceness:
+            os.nice(niceness)
+    except OSError as e:
+        logger.warning("Failed to set inference process affinity/nice: %s", e)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        from vision.scene import Scene
+
+        try:
+            scene = Scene(**scene_kwargs)
+        except Exception as e:
+            conn.send(("error", str(e)))
+            return
+        conn.send(("ready", (dict(scene.names), scene.imgsz, bool(getattr(scene.backend, "dynamic", False)))))
+
+        ring = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=shm.buf)
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break
+            if msg is None:
+                break
+            if msg[0] == "imgsz":
+                ok = scene.set_imgsz(msg[1])
+                conn.send_bytes(b"imgsz" + (scene.imgsz if ok else 0).to_bytes(4, "little"))
+                continue
+            seq, slot, h, w = msg
+            frame = np.ascontiguousarray(ring[slot, :h, :w])
+            try:
+                boxes, scores, classes = scene.backend.infer(frame)
+            except Exception as e:
+                logger.error("YOLO inference failed: %s", e)
+                boxes, scores, classes = np.empty((0, 4)), np.empty(0), np.empty(0)
+            conn.send_bytes(seq.to_bytes(8, "little") + _pack(boxes, scores, classes))
+        del ring
+    finally:
+        shm.close()
+
+
+class RemoteScene:
+    """
+    Scene yang berjalan di proses terpisah. Frame diserahkan lewat ring shared_memory
+    (tanpa pickle), hasil deteksi kembali sebagai bytes float32 ringkas lewat Pipe.
+    Interface sama dengan Scene.detect() jadi bisa dibungkus InferenceScheduler.
+    """
+
+    def __init__(self, width=640, height=480, slots=2, cpus=None, niceness=None, timeout=5.0,
+                 load_timeout=300.0, **scene_kwargs):
+        if cpus is None and os.getenv("VISION_CPUS"):
+            cpus = {int(c) for c in os.getenv("VISION_CPUS").split(",") if c.strip()}
+        if niceness is None:
+            niceness = int(os.getenv("VISION_NICE", "0"))
+
+        self.shape = (height, width, 3)
+        self.slots = slots
+        self.timeout = timeout
+        self._seq = 0
+        self._slot = 0
+        self._pending_imgsz = None
+
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * height * width * 3)
+        self._ring = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self._shm.buf)
+
+        ctx = mp.get_context("spawn")  # jangan fork proses yang sudah punya thread audio/kamera
+        self._conn, child = ctx.Pipe()
+        self._proc = ctx.Process(
+            target=_worker_main,
+            args=(child, self._shm.name, slots, self.shape, scene_kwargs, cpus, niceness),
+            name="yolo-worker",
+            daemon=True,
+        )
+        self._proc.start()
+        child.close()
+
+        if not self._conn.poll(load_timeout):
+            self.close()
+            raise RuntimeError("❌ Inference process did not start in time")
+        status, payload = self._conn.recv()
+        if status != "ready":
+            self.close()
+            raise RuntimeError(f"❌ Failed to load YOLO model in inference process: {payload}")
+        self.names, self.imgsz, self.dynamic = payload
+
+    def detect(self, frame):
+        if frame is None:
+            return None, Detections.empty(self.names)
+
+        h, w = frame.shape[:2]
+        if h > self.shape[0] or w > self.shape[1]:
+            logger.error("Frame %dx%d larger than shared ring %dx%d", w, h, self.shape[1], self.shape[0])
+            return frame, Detections.empty(self.names)
+
+        self._seq += 1
+        self._slot = (self._slot + 1) % self.slots
+        np.copyto(self._ring[self._slot, :h, :w], frame)
+        try:
+            if self._pending_imgsz is not None:
+                self._conn.send(("imgsz", self._pending_imgsz))
+                self._pending_imgsz = None
+            self._conn.send((self._seq, self._slot, h, w))
+            # buang balasan lama (mis. dari request yang timeout sebelumnya)
+            while True:
+                if not self._conn.poll(self.timeout):
+                    logger.error("Inference process timed out")
+                    return frame, Detections.empty(self.names)
+                data = self._conn.recv_bytes()
+                if data.startswith(b"imgsz"):
+                    self.imgsz = int.from_bytes(data[5:], "little") or self.imgsz
+                    continue
+                if int.from_bytes(data[:8], "little") == self._seq:
+                    break
+        except (EOFError, BrokenPipeError, OSError) as e:
+            logger.error("Inference process unavailable: %s", e)
+            return frame, Detections.empty(self.names)
+
+        return frame, _unpack(data[8:], self.names)
+
+    def set_imgsz(self, imgsz: int) -> bool:
+        """
+        Minta ukuran input YOLO baru. Dikirim bersama request detect() berikutnya (Pipe hanya
+        dipakai dari vision thread). Return False kalau model di proses worker berinput statis
+        (dilaporkan worker saat ready), sama seperti Scene.set_imgsz().
+        """
+        if not self.dynamic:
+            return False
+        self._pending_imgsz = int(imgsz)
+        return True
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.is_alive()
+
+    def close(self):
+        try:
+            self._conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self._proc.join(timeout=2.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        del self._ring
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
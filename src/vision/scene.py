@@ -1,53 +1,345 @@
-from ultralytics import YOLO
-import cv2
+import ast
+import logging
 import os
 
+import cv2
+import numpy as np
+
+DEFAULT_MODEL = "models/yolov8n.pt"
+
+logger = logging.getLogger(__name__)
+
+
+# =====================
+# Inference backends
+# =====================
+# Semua backend mengembalikan (boxes, scores, classes) dalam koordinat frame asli:
+#   boxes   float32 (N, 4) xyxy
+#   scores  float32 (N,)
+#   classes int32   (N,)
+class UltralyticsBackend:
+    """YOLO lewat ultralytics. Bisa load .pt, .onnx, folder *_ncnn_model dan *_openvino_model."""
+
+    def __init__(self, model_path=DEFAULT_MODEL, imgsz=640, threads=None, conf=0.25):
+        from ultralytics import YOLO
+
+        if threads:
+            try:
+                import torch
+                torch.set_num_threads(threads)
+            except ImportError:
+                pass
+
+        self.imgsz = imgsz
+        self.conf = conf
+        # hanya .pt yang bisa ganti ukuran input; export onnx/ncnn/openvino ukurannya tetap
+        self.dynamic = str(model_path).endswith(".pt")
+        self.model = YOLO(model_path, task="detect")
+        self.names = self.model.names or {}
+
+    def infer(self, frame):
+        results = self.model(frame, imgsz=self.imgsz, conf=self.conf, verbose=False)
+        boxes, scores, classes = [], [], []
+        for r in results:
+            if getattr(r, "names", None):
+                self.names = r.names
+            if not hasattr(r, "boxes") or r.boxes is None or len(r.boxes) == 0:
+                continue
+            # satu konversi tensor -> numpy per result, bukan per box
+            data = r.boxes.data.cpu().numpy()
+            boxes.append(data[:, :4])
+            scores.append(data[:, 4])
+            classes.append(data[:, 5])
+        if not boxes:
+            return np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int32)
+        return (
+            np.concatenate(boxes).astype(np.float32, copy=False),
+            np.concatenate(scores).astype(np.float32, copy=False),
+            np.concatenate(classes).astype(np.int32),
+        )
+
+
+class OnnxRuntimeBackend:
+    """YOLOv8 hasil export ONNX dijalankan langsung dengan onnxruntime (tanpa torch)."""
+
+    def __init__(self, model_path, imgsz=640, threads=None, conf=0.25, iou=0.45):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # model dengan input statis memaksa ukuran input sesuai export
+        shape = self.session.get_inputs()[0].shape
+        self.dynamic = not (isinstance(shape[2], int) and isinstance(shape[3], int))
+        if not self.dynamic:
+            imgsz = shape[2]
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        try:
+            self.names = ast.literal_eval(meta.get("names", "{}"))
+        except (ValueError, SyntaxError):
+            self.names = {}
+
+        self._canvas = None
+        self._blob = None
+
+    def _letterbox(self, frame):
+        h, w = frame.shape[:2]
+        size = self.imgsz
+        scale = min(size / h, size / w)
+        nh, nw = int(round(h * scale)), int(round(w * scale))
+        top, left = (size - nh) // 2, (size - nw) // 2
+
+        if self._canvas is None or self._canvas.shape[0] != size:
+            self._canvas = np.empty((size, size, 3), dtype=np.uint8)
+            self._blob = np.empty((1, 3, size, size), dtype=np.float32)
+        self._canvas.fill(114)
+        self._canvas[top:top + nh, left:left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+        # BGR HWC uint8 -> RGB CHW float32 0..1
+        np.multiply(self._canvas[:, :, ::-1].transpose(2, 0, 1), 1.0 / 255.0, out=self._blob[0], casting="unsafe")
+        return scale, left, top
+
+    def infer(self, frame):
+        scale, pad_x, pad_y = self._letterbox(frame)
+        out = self.session.run(None, {self.input_name: self._blob})[0]
+
+        # output YOLOv8: (1, 4 + num_classes, N)
+        preds = out[0].T
+        class_scores = preds[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+        keep = scores >= self.conf
+        if not keep.any():
+            return np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int32)
+
+        xywh = preds[keep, :4]
+        scores = scores[keep]
+        classes = classes[keep]
+
+        # NMSBoxes butuh (x, y, w, h) dengan x, y pojok kiri atas
+        tlwh = xywh.copy()
+        tlwh[:, :2] -= xywh[:, 2:] / 2
+        idx = cv2.dnn.NMSBoxes(tlwh.tolist(), scores.tolist(), self.conf, self.iou)
+        idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+
+        tlwh = tlwh[idx]
+        boxes = np.empty_like(tlwh)
+        boxes[:, 0] = (tlwh[:, 0] - pad_x) / scale
+        boxes[:, 1] = (tlwh[:, 1] - pad_y) / scale
+        boxes[:, 2] = boxes[:, 0] + tlwh[:, 2] / scale
+        boxes[:, 3] = boxes[:, 1] + tlwh[:, 3] / scale
+
+        h, w = frame.shape[:2]
+        np.clip(boxes[:, 0::2], 0, w, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, h, out=boxes[:, 1::2])
+        return (
+            boxes.astype(np.float32),
+            scores[idx].astype(np.float32),
+            classes[idx].astype(np.int32),
+        )
+
+
+# =====================
+# Detection results
+# =====================
+class DetectedObject:
+    """View ringan ke satu baris Detections (tanpa copy data)."""
+
+    __slots__ = ("_dets", "_i")
+
+    def __init__(self, dets, i):
+        self._dets = dets
+        self._i = i
+
+    @property
+    def label(self) -> str:
+        cls = int(self._dets.classes[self._i])
+        return self._dets.names.get(cls, str(cls))
+
+    @property
+    def cls(self) -> int:
+        return int(self._dets.classes[self._i])
+
+    @property
+    def confidence(self) -> float:
+        return float(self._dets.scores[self._i])
+
+    @property
+    def box(self):
+        return tuple(int(v) for v in self._dets.boxes[self._i])
+
+    def to_dict(self):
+        return {"label": self.label, "confidence": self.confidence, "box": self.box}
+
+    def __repr__(self):
+        return f"DetectedObject({self.label!r}, {self.confidence:.2f}, {self.box})"
+
+
+class Detections:
+    """Hasil deteksi satu frame dalam bentuk array: boxes (N,4) xyxy, scores (N,), classes (N,)."""
+
+    __slots__ = ("boxes", "scores", "classes", "names")
+
+    def __init__(self, boxes, scores, classes, names=None):
+        self.boxes = boxes
+        self.scores = scores
+        self.classes = classes
+        self.names = names or {}
+
+    @classmethod
+    def empty(cls, names=None):
+        return cls(np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int32), names)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __bool__(self):
+        return len(self.scores) > 0
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return DetectedObject(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.scores)):
+            yield DetectedObject(self, i)
+
+    @property
+    def labels(self):
+        names = self.names
+        return [names.get(c, str(c)) for c in self.classes.tolist()]
+
+    def filter(self, min_conf: float):
+        keep = self.scores >= min_conf
+        return Detections(self.boxes[keep], self.scores[keep], self.classes[keep], self.names)
+
+
+def annotate(frame, detections, color=(0, 255, 0)):
+    """Gambar box + label ke frame (in-place). Hanya dipanggil kalau hasilnya memang ditampilkan."""
+    if frame is None or not detections:
+        return frame
+    names = detections.names
+    for (x1, y1, x2, y2), conf, cls in zip(
+        detections.boxes.astype(int).tolist(), detections.scores.tolist(), detections.classes.tolist()
+    ):
+        label = names.get(cls, str(cls))
+        # draw box safely
+        x1, y1 = max(0, x1), max(0, y1)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(
+            frame,
+            f"{label} {conf:.2f}",
+            (x1, max(10, y1 - 5)),  # cegah negatif
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            color,
+            2,
+        )
+    return frame
+
+
+BACKENDS = {
+    "ultralytics": UltralyticsBackend,
+    "onnxruntime": OnnxRuntimeBackend,
+}
+
+
+def _guess_backend(model_path):
+    if model_path.endswith(".onnx"):
+        return "onnxruntime"
+    # .pt, *_ncnn_model, *_openvino_model dll. lewat ultralytics
+    return "ultralytics"
+
+
+def export_model(model_path=DEFAULT_MODEL, fmt="onnx", imgsz=320):
+    """Export model .pt ke format CPU-friendly (onnx | ncnn | openvino). Return path hasil export."""
+    from ultralytics import YOLO
+
+    return YOLO(model_path).export(format=fmt, imgsz=imgsz, dynamic=False)
+
+
 class Scene:
-    def __init__(self, model_path="models/yolov8n.pt"):
-        if not os.path.exists(model_path) and model_path == "models/yolov8n.pt":
-            print("[Warning] Model path not found, using default pretrained YOLO")
+    def __init__(self, model_path=None, backend=None, imgsz=None, threads=None, warmup=True):
+        model_path = model_path or os.getenv("VISION_MODEL", DEFAULT_MODEL)
+        backend = backend or os.getenv("VISION_BACKEND") or _guess_backend(model_path)
+        imgsz = int(imgsz or os.getenv("VISION_IMGSZ", "640"))
+        threads = threads or (int(os.getenv("VISION_THREADS")) if os.getenv("VISION_THREADS") else None)
+
+        if not os.path.exists(model_path) and model_path == DEFAULT_MODEL:
+            logger.warning("Model path not found, using default pretrained YOLO")
+        if backend not in BACKENDS:
+            raise RuntimeError(f"❌ Unknown vision backend {backend!r}, choose one of {list(BACKENDS)}")
+
         try:
-            self.model = YOLO(model_path)
+            self.backend = BACKENDS[backend](model_path, imgsz=imgsz, threads=threads)
         except Exception as e:
-            raise RuntimeError(f"❌ Failed to load YOLO model {model_path}: {e}")
+            raise RuntimeError(f"❌ Failed to load YOLO model {model_path} ({backend}): {e}")
+
+        self.backend_name = backend
+        if warmup:
+            self.warmup()
+
+    def warmup(self, runs=1):
+        """Inference dummy supaya lazy-init backend tidak dibayar oleh frame pertama."""
+        dummy = np.zeros((self.backend.imgsz, self.backend.imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            try:
+                self.backend.infer(dummy)
+            except Exception as e:
+                logger.warning("Warmup inference failed: %s", e)
+                return
+
+    @property
+    def names(self):
+        return self.backend.names
+
+    @property
+    def imgsz(self) -> int:
+        return self.backend.imgsz
+
+    def set_imgsz(self, imgsz: int) -> bool:
+        """Ganti ukuran input YOLO saat runtime. Return False kalau model punya input statis."""
+        if not getattr(self.backend, "dynamic", False):
+            return False
+        self.backend.imgsz = int(imgsz)
+        return True
 
     def detect(self, frame):
+        """Return (frame, Detections). Frame tidak digambari; pakai annotate() kalau perlu."""
         if frame is None:
-            return None, []
+            return None, Detections.empty(self.backend.names)
 
         try:
-            results = self.model(frame, verbose=False)
+            boxes, scores, classes = self.backend.infer(frame)
         except Exception as e:
-            print(f"[Error] YOLO inference failed: {e}")
-            return frame, []
+            logger.error("YOLO inference failed: %s", e)
+            return frame, Detections.empty(self.backend.names)
 
-        objects = []
-        for r in results:
-            if not hasattr(r, "boxes") or r.boxes is None:
-                continue
+        return frame, Detections(boxes, scores, classes, self.backend.names)
+
+    @staticmethod
+    def annotate(frame, detections):
+        return annotate(frame, detections)
+
+
+if __name__ == "__main__":
+    import argparse
 
-            for box in r.boxes:
-                try:
-                    cls = int(box.cls[0])
-                    label = r.names.get(cls, str(cls))
-                    conf = float(box.conf[0])
-                    objects.append({"label": label, "confidence": conf})
-
-                    # draw box safely
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    x1, y1 = max(0, x1), max(0, y1)
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(
-                        frame,
-                        f"{label} {conf:.2f}",
-                        (x1, max(10, y1 - 5)),  # cegah negatif
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        (0, 255, 0),
-                        2,
-                    )
-                except Exception as e:
-                    print(f"[Warning] Skipped box due to error: {e}")
-                    continue
-
-        return frame, objects
+    parser = argparse.ArgumentParser(description="Export YOLO model untuk backend CPU")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--format", default="onnx", choices=["onnx", "ncnn", "openvino"])
+    parser.add_argument("--imgsz", type=int, default=320)
+    args = parser.parse_args()
+    print(export_model(args.model, args.format, args.imgsz))
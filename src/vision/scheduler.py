@@ -0,0 +1,83 @@
+import time
+import logging
+
+import cv2
+import numpy as np
+
+from vision.scene import Detections
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceScheduler:
+    """
+    Pembungkus Scene yang melewati YOLO saat scene statis.
+    Gerakan dideteksi dari selisih frame grayscale yang diperkecil, inference dibatasi
+    max_fps, dan hasil deteksi terakhir dipakai ulang (beserta umurnya) di antara run.
+    """
+
+    def __init__(self, scene, max_fps: float = 5.0, motion_threshold: float = 6.0,
+                 max_age: float = 2.0, downscale=(64, 48)):
+        self.scene = scene
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.motion_threshold = motion_threshold  # rata-rata selisih piksel (0-255)
+        self.max_age = max_age  # paksa inference walau statis setelah sekian detik
+        self.downscale = downscale
+
+        self._ref = None  # frame kecil saat inference terakhir
+        self._small = np.empty((downscale[1], downscale[0]), dtype=np.uint8)
+        self._diff = np.empty_like(self._small)
+        self._last_run = 0.0
+        self._last_objects = Detections.empty()
+
+        self.runs = 0
+        self.skipped = 0
+
+    @property
+    def max_fps(self) -> float:
+        return 1.0 / self.min_interval if self.min_interval else 0.0
+
+    def set_max_fps(self, max_fps: float):
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+
+    def motion_score(self, frame) -> float:
+        small = cv2.resize(frame, self.downscale, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._small)
+        if self._ref is None:
+            return float("inf")
+        cv2.absdiff(self._small, self._ref, dst=self._diff)
+        return float(self._diff.mean())
+
+    def process(self, frame, now: float = None):
+        """
+        Return (frame, objects, age, ran). `age` adalah umur deteksi dalam detik,
+        `ran` True jika YOLO benar-benar dijalankan untuk frame ini.
+        """
+        if frame is None:
+            return None, self._last_objects, 0.0, False
+        now = time.monotonic() if now is None else now
+        since = now - self._last_run
+
+        if since < self.min_interval:
+            self.skipped += 1
+            return frame, self._last_objects, since, False
+
+        score = self.motion_score(frame)
+        if score < self.motion_threshold and since < self.max_age:
+            self.skipped += 1
+            return frame, self._last_objects, since, False
+
+        frame, objects = self.scene.detect(frame)
+        if self._ref is None:
+            self._ref = self._small.copy()
+        else:
+            np.copyto(self._ref, self._small)
+        self._last_run = now
+        self._last_objects = objects
+        self.runs += 1
+        return frame, objects, 0.0, True
+
+    @property
+    def skip_ratio(self) -> float:
+        total = self.runs + self.skipped
+        return self.skipped / total if total else 0.0
@@ -0,0 +1,183 @@
+import itertools
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class TrackedObject(NamedTuple):
+    id: int
+    label: str
+    confidence: float
+    box: Tuple[int, int, int, int]
+    first_seen: float
+    last_seen: float
+    hits: int
+
+    @property
+    def duration(self) -> float:
+        """Berapa lama objek ini sudah terlihat (detik)."""
+        return self.last_seen - self.first_seen
+
+
+class SceneSnapshot(NamedTuple):
+    version: int
+    timestamp: float  # time.monotonic() frame sumber
+    frame_seq: int
+    objects: Tuple[TrackedObject, ...]
+    detections: object = None  # Detections mentah dari frame terakhir
+    frame_size: Optional[Tuple[int, int]] = None  # (width, height) frame sumber
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.timestamp if self.timestamp else float("inf")
+
+
+EMPTY_SNAPSHOT = SceneSnapshot(0, 0.0, -1, ())
+
+
+def iou_matrix(a, b):
+    """IoU antar dua set box xyxy: a (N,4), b (M,4) -> (N,M)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class _Track:
+    __slots__ = ("id", "cls", "box", "conf", "first_seen", "last_seen", "hits", "misses")
+
+    def __init__(self, track_id, cls, box, conf, now):
+        self.id = track_id
+        self.cls = cls
+        self.box = box
+        self.conf = conf
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = 1
+        self.misses = 0
+
+
+class SceneState:
+    """
+    Store scene yang thread-safe. Vision thread memanggil publish(); pembaca mengambil
+    snapshot() (O(1), tanpa lock) atau menunggu perubahan dengan wait_for_change().
+    Objek dilacak antar frame dengan IoU tracker sederhana supaya satu frame YOLO yang
+    miss tidak langsung membuat robot "tidak melihat apa-apa".
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_misses: int = 5, hold_time: float = 1.5,
+                 min_hits: int = 1, max_tracks: int = 64):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses  # frame berturut-turut tanpa match sebelum track dibuang
+        self.hold_time = hold_time  # ... atau detik sejak terakhir terlihat
+        self.min_hits = min_hits
+        self.max_tracks = max_tracks
+
+        self._tracks = []
+        self._ids = itertools.count(1)
+        self._snapshot = EMPTY_SNAPSHOT
+        self._cond = threading.Condition()
+
+    # ---------- writer (vision thread) ----------
+    def publish(self, detections, frame_seq: int = -1, timestamp: Optional[float] = None,
+                frame_size: Optional[Tuple[int, int]] = None) -> SceneSnapshot:
+        now = time.monotonic() if timestamp is None else timestamp
+        self._update_tracks(detections, now)
+
+        names = getattr(detections, "names", {}) or {}
+        objects = tuple(
+            TrackedObject(
+                t.id, names.get(t.cls, str(t.cls)), t.conf,
+                tuple(int(v) for v in t.box), t.first_seen, t.last_seen, t.hits,
+            )
+            for t in self._tracks
+            if t.hits >= self.min_hits
+        )
+
+        snap = SceneSnapshot(self._snapshot.version + 1, now, frame_seq, objects, detections,
+                             frame_size or self._snapshot.frame_size)
+        with self._cond:
+            self._snapshot = snap
+            self._cond.notify_all()
+        return snap
+
+    def _update_tracks(self, detections, now):
+        boxes = detections.boxes if detections is not None else np.empty((0, 4), np.float32)
+        classes = detections.classes if detections is not None else np.empty(0, np.int32)
+        scores = detections.scores if detections is not None else np.empty(0, np.float32)
+
+        matched_dets = set()
+        if self._tracks and len(boxes):
+            track_boxes = np.array([t.box for t in self._tracks], dtype=np.float32)
+            track_cls = np.array([t.cls for t in self._tracks], dtype=np.int32)
+            ious = iou_matrix(track_boxes, boxes)
+            ious[track_cls[:, None] != classes[None, :]] = 0.0
+
+            # greedy matching dari IoU terbesar
+            order = np.dstack(np.unravel_index(np.argsort(-ious, axis=None), ious.shape))[0]
+            matched_tracks = set()
+            for ti, di in order:
+                if ious[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                t = self._tracks[ti]
+                t.box = boxes[di].copy()
+                t.conf = float(scores[di])
+                t.last_seen = now
+                t.hits += 1
+                t.misses = 0
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+            for ti, t in enumerate(self._tracks):
+                if ti not in matched_tracks:
+                    t.misses += 1
+        else:
+            for t in self._tracks:
+                t.misses += 1
+
+        # buang track yang sudah terlalu lama hilang
+        self._tracks = [
+            t for t in self._tracks
+            if t.misses <= self.max_misses and now - t.last_seen <= self.hold_time
+        ]
+
+        for di in range(len(boxes)):
+            if di not in matched_dets:
+                self._tracks.append(_Track(next(self._ids), int(classes[di]), boxes[di].copy(), float(scores[di]), now))
+
+        # batasi memori: simpan track dengan last_seen terbaru
+        if len(self._tracks) > self.max_tracks:
+            self._tracks.sort(key=lambda t: t.last_seen, reverse=True)
+            del self._tracks[self.max_tracks:]
+
+    # ---------- readers ----------
+    def snapshot(self) -> SceneSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def wait_for_change(self, version: int, timeout: Optional[float] = None) -> Optional[SceneSnapshot]:
+        """Tunggu snapshot dengan version > `version`. Return None jika timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._snapshot.version > version, timeout):
+                return None
+            return self._snapshot
+
+    def clear(self):
+        self._tracks = []
+        with self._cond:
+            self._snapshot = SceneSnapshot(self._snapshot.version + 1, time.monotonic(), -1, (),
+                                           frame_size=self._snapshot.frame_size)
+            self._cond.notify_all()
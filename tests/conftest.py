@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modul robot di-import seperti saat dijalankan dari src/ (python src/main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,123 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.governor import Governor, LEVELS
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.max_fps = 10.0
+        self.scene = SimpleNamespace(imgsz=640, set_imgsz=self._set_imgsz)
+
+    def set_max_fps(self, fps):
+        self.max_fps = fps
+
+    def _set_imgsz(self, imgsz):
+        self.scene.imgsz = imgsz
+        return True
+
+
+class FakeCamera:
+    cap = object()
+
+    def __init__(self):
+        self.size = (640, 480)
+
+    def resolution(self):
+        return self.size
+
+    def set_resolution(self, width, height):
+        self.size = (width, height)
+        return True
+
+
+class FakeSTT:
+    def __init__(self):
+        self.blocksize = 2000
+        self.backlog = 0
+
+    def pending(self):
+        return self.backlog
+
+    def set_blocksize(self, blocksize):
+        self.blocksize = blocksize
+        return True
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    thermal = tmp_path / "temp"
+    stat = tmp_path / "stat"
+    # /proc/stat statis: tidak ada jiffies baru -> beban 0
+    stat.write_text("cpu  40 0 10 950 0\ncpu0 20 0 5 475 0\ncpu1 20 0 5 475 0\n")
+
+    def set_temp(celsius):
+        thermal.write_text(f"{int(celsius * 1000)}\n")
+
+    set_temp(50)
+    return SimpleNamespace(thermal=str(thermal), stat=str(stat), set_temp=set_temp)
+
+
+@pytest.fixture
+def gov(sysfs):
+    return Governor(FakeScheduler(), FakeCamera(), FakeSTT(), thermal_path=sysfs.thermal, stat_path=sysfs.stat,
+                    interval=0.01, temps=(65, 72, 78, 82), hysteresis=3.0)
+
+
+def test_escalates_one_level_per_step(gov, sysfs):
+    sysfs.set_temp(90)  # di atas semua ambang, tetap naik satu langkah per step
+    for expected in range(1, len(LEVELS)):
+        assert gov.step()
+        assert gov.level == expected
+    assert not gov.step()  # sudah di level teratas
+    assert gov.scheduler.max_fps == 2.0
+    assert gov.scene.imgsz == 320
+    assert gov.camera.size == (320, 240)
+    assert gov.stt.blocksize == 4000
+
+
+def test_audio_backlog_escalates(gov):
+    gov.stt.backlog = 10
+    assert gov.step()
+    assert gov.level == 1
+    assert gov.last["audio_backlog"] == 10
+
+
+def test_recovery_needs_hysteresis(gov, sysfs):
+    sysfs.set_temp(66)
+    assert gov.step()
+    assert gov.level == 1
+    assert gov.scheduler.max_fps == 5.0
+
+    sysfs.set_temp(63)  # di bawah ambang 65, tapi belum 3°C di bawahnya
+    assert not gov.step()
+    assert gov.level == 1
+
+    sysfs.set_temp(61)
+    assert gov.step()
+    assert gov.level == 0
+    assert gov.scheduler.max_fps == 10.0
+    assert gov.scene.imgsz == 640
+
+
+def test_run_restores_knobs_on_stop(gov, sysfs):
+    sysfs.set_temp(90)
+    stop = threading.Event()
+    thread = threading.Thread(target=gov.run, args=(stop,), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 2.0
+    while gov.level < len(LEVELS) - 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert gov.level == len(LEVELS) - 1
+
+    stop.set()
+    thread.join(timeout=1.0)
+    assert not thread.is_alive()
+    assert gov.level == 0
+    assert gov.scheduler.max_fps == 10.0
+    assert gov.scene.imgsz == 640
+    assert gov.camera.size == (640, 480)
+    assert gov.stt.blocksize == 2000
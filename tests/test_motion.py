@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from control.drive import MockDrive
+from control.motion import STOP
+
+
+@pytest.fixture
+def drive():
+    d = MockDrive(rate_hz=200, ramp_rate=50.0, watchdog_timeout=0.2)
+    names = []
+    d.executor.on_command = lambda cmd, ts: names.append(cmd.name)
+    d.commands = names
+    yield d
+    d.close()
+
+
+def speeds(d):
+    return d.left.value, d.right.value
+
+
+def test_timed_command_runs_then_stops(drive):
+    drive.forward(speed=0.5, duration=0.1)
+    time.sleep(0.05)
+    assert speeds(drive) == (0.5, 0.5)
+    assert drive.wait(timeout=1.0)
+    assert speeds(drive) == (0.0, 0.0)
+    assert drive.commands == ["forward", "stop"]
+
+
+def test_override_replaces_active_and_queued(drive):
+    drive.forward(duration=1.0)
+    drive.backward(duration=1.0, queue=True)
+    drive.turn_left(speed=0.4, duration=0.05)  # override: forward & backward yang antre dibuang
+    assert drive.executor.current.name == "turn_left"
+    assert drive.wait(timeout=1.0)
+    assert drive.commands == ["forward", "turn_left", "stop"]
+
+
+def test_queued_commands_run_in_order(drive):
+    drive.forward(duration=0.05)
+    drive.turn_right(duration=0.05, queue=True)
+    assert drive.wait(timeout=1.0)
+    assert drive.commands == ["forward", "turn_right", "stop"]
+
+
+def test_stop_is_not_ramped():
+    d = MockDrive(rate_hz=200, ramp_rate=1.0, watchdog_timeout=None)
+    try:
+        d.forward(speed=1.0)
+        time.sleep(0.1)
+        left, _ = speeds(d)
+        assert 0.0 < left < 1.0  # masih ramp (1.0 per detik)
+        d.stop()
+        assert d.wait(timeout=0.1)
+        assert speeds(d) == (0.0, 0.0)
+    finally:
+        d.close()
+
+
+def test_watchdog_stops_unrefreshed_command(drive):
+    drive.forward(speed=0.5)  # tanpa durasi: harus di-refresh
+    deadline = time.monotonic() + 0.15
+    while time.monotonic() < deadline:
+        drive.refresh()
+        time.sleep(0.02)
+    assert speeds(drive) == (0.5, 0.5)
+    assert drive.wait(timeout=1.0)
+    assert drive.executor.watchdog_trips == 1
+    assert drive.executor.current is STOP
+    assert speeds(drive) == (0.0, 0.0)